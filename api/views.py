@@ -0,0 +1,197 @@
+"""Read-only JSON API over posts, comments, groups and follows.
+
+Lists are keyset-paginated with posts.pagination.CursorPaginator and
+select_related everything they serialize, so a page runs the same one or
+two queries whatever its `limit`. `?fields=id,text` returns a subset of
+the fields. Responses carry an ETag of their body and answer 304 to a
+matching If-None-Match, and are gzipped for clients that accept it.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, set_response_etag
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_safe
+
+from posts import feeds
+from posts.models import Comment, Follow, Group, Post
+from posts.pagination import (COMMENT_ORDERING, FEED_ORDERING,
+                              CursorPaginator, InvalidCursor)
+
+POST_FIELDS = {
+    "id": lambda post: post.id,
+    "text": lambda post: post.text,
+    "pub_date": lambda post: post.pub_date,
+    "author": lambda post: post.author.username,
+    "group": lambda post: post.group.slug if post.group_id else None,
+    "image": lambda post: post.image.url if post.image else None,
+    "comments_count": lambda post: post.comments_count,
+}
+
+COMMENT_FIELDS = {
+    "id": lambda comment: comment.id,
+    "post": lambda comment: comment.post_id,
+    "author": lambda comment: comment.author.username,
+    "text": lambda comment: comment.text,
+    "created": lambda comment: comment.created,
+}
+
+GROUP_FIELDS = {
+    "slug": lambda group: group.slug,
+    "title": lambda group: group.title,
+    "description": lambda group: group.description,
+}
+
+FOLLOW_FIELDS = {
+    "id": lambda follow: follow.id,
+    "user": lambda follow: follow.user.username,
+    "author": lambda follow: follow.author.username,
+}
+
+POST_ORDERINGS = {
+    "new": FEED_ORDERING,
+    "popular": ("-score", "-id"),
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def api_view(view):
+    """Turn the data `view` returns into a conditional, gzipped response."""
+    @gzip_page
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            data = view(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({"detail": error.detail}, status=error.status)
+        response = JsonResponse(
+            data, json_dumps_params={"ensure_ascii": False}
+        )
+        set_response_etag(response)
+        return get_conditional_response(
+            request, etag=response["ETag"], response=response
+        )
+    return wrapper
+
+
+def select_fields(request, available):
+    names = request.GET.get("fields")
+    if not names:
+        return available
+    names = names.split(",")
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(400, f"Unknown fields: {', '.join(unknown)}")
+    return {name: available[name] for name in names}
+
+
+def serialize(obj, fields):
+    return {name: get(obj) for name, get in fields.items()}
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get("limit", settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, "limit must be a number")
+    if not 1 <= size <= settings.API_MAX_PAGE_SIZE:
+        raise ApiError(
+            400, f"limit must be between 1 and {settings.API_MAX_PAGE_SIZE}"
+        )
+    return size
+
+
+def link(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query["cursor"] = cursor
+    return request.build_absolute_uri(f"?{query.urlencode()}")
+
+
+def paginated(request, queryset, available, ordering):
+    fields = select_fields(request, available)
+    paginator = CursorPaginator(queryset, page_size(request), ordering)
+    try:
+        page = paginator.page(request.GET.get("cursor"))
+    except InvalidCursor:
+        raise ApiError(400, "Invalid cursor")
+    return {
+        "results": [serialize(obj, fields) for obj in page],
+        "next": link(request, page.next_cursor),
+        "previous": link(request, page.previous_cursor),
+    }
+
+
+def detail(request, queryset, available, **lookup):
+    fields = select_fields(request, available)
+    obj = queryset.filter(**lookup).first()
+    if obj is None:
+        raise ApiError(404, "Not found")
+    return serialize(obj, fields)
+
+
+@api_view
+def posts(request):
+    """?author=<username>, ?group=<slug>, ?ordering=new|popular."""
+    queryset = feeds.load(Post.objects.all())
+    if "author" in request.GET:
+        queryset = queryset.filter(author__username=request.GET["author"])
+    if "group" in request.GET:
+        queryset = queryset.filter(group__slug=request.GET["group"])
+    ordering = POST_ORDERINGS.get(request.GET.get("ordering", "new"))
+    if ordering is None:
+        raise ApiError(
+            400, f"ordering must be one of: {', '.join(POST_ORDERINGS)}"
+        )
+    return paginated(request, queryset, POST_FIELDS, ordering)
+
+
+@api_view
+def post(request, post_id):
+    return detail(
+        request, feeds.load(Post.objects.all()), POST_FIELDS, id=post_id
+    )
+
+
+@api_view
+def comments(request, post_id):
+    if not Post.objects.filter(id=post_id).exists():
+        raise ApiError(404, "Not found")
+    return paginated(
+        request,
+        Comment.objects.filter(post_id=post_id).select_related("author"),
+        COMMENT_FIELDS,
+        COMMENT_ORDERING,
+    )
+
+
+@api_view
+def groups(request):
+    return paginated(
+        request, Group.objects.all(), GROUP_FIELDS, ("title", "id")
+    )
+
+
+@api_view
+def group(request, slug):
+    return detail(request, Group.objects.all(), GROUP_FIELDS, slug=slug)
+
+
+@api_view
+def follows(request):
+    """?user=<username> lists whom they follow, ?author= their followers."""
+    queryset = Follow.objects.select_related("user", "author")
+    if "user" in request.GET:
+        queryset = queryset.filter(user__username=request.GET["user"])
+    if "author" in request.GET:
+        queryset = queryset.filter(author__username=request.GET["author"])
+    return paginated(request, queryset, FOLLOW_FIELDS, ("-id",))
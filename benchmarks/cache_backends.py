@@ -0,0 +1,103 @@
+"""Compare cache backends under a multi-process read-through load.
+
+Every worker process repeatedly looks up a key drawn from a Zipf-like
+distribution (as feed pages and post cards are) and, on a miss, pays a
+simulated render cost and stores the value. LocMemCache keeps one copy per
+process, so its hit rate drops as workers are added; the shared SQLite
+cache keeps one copy for all of them.
+
+    python benchmarks/cache_backends.py --workers 4 --requests 5000
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+    "shared": {
+        "BACKEND": "yatube.cache.SQLiteCache",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+}
+
+
+def zipf_keys(count, keys, seed, skew=1.1):
+    rng = random.Random(seed)
+    weights = [1 / (rank ** skew) for rank in range(1, keys + 1)]
+    return rng.choices(range(keys), weights=weights, k=count)
+
+
+def worker(backend, options):
+    import django
+    from django.conf import settings
+
+    settings.configure(CACHES={"default": backend})
+    django.setup()
+    from django.core.cache import cache
+
+    hits, latencies = 0, []
+    payload = "x" * options.value_size
+    for key in zipf_keys(options.requests, options.keys, os.getpid()):
+        started = time.perf_counter()
+        value = cache.get(f"page:{key}")
+        latencies.append(time.perf_counter() - started)
+        if value is None:
+            time.sleep(options.miss_cost / 1000)
+            cache.set(f"page:{key}", payload, 300)
+        else:
+            hits += 1
+    return hits, latencies
+
+
+def run(name, options):
+    backend = dict(BACKENDS[name])
+    if name == "shared":
+        backend["LOCATION"] = os.path.join(
+            tempfile.mkdtemp(), "cache.sqlite3"
+        )
+    started = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(options.workers) as pool:
+        results = pool.starmap(
+            worker, [(backend, options)] * options.workers
+        )
+    elapsed = time.perf_counter() - started
+    hits = sum(result[0] for result in results)
+    latencies = sorted(l for result in results for l in result[1])
+    total = len(latencies)
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:8} hit rate {hits / total:6.1%}  "
+        f"get p50 {quantiles[49] * 1e6:7.1f}us  "
+        f"p99 {quantiles[98] * 1e6:7.1f}us  "
+        f"throughput {total / elapsed:8.0f} req/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=5000,
+                        help="lookups per worker")
+    parser.add_argument("--keys", type=int, default=2000)
+    parser.add_argument("--value-size", type=int, default=4096)
+    parser.add_argument("--miss-cost", type=float, default=2.0,
+                        help="simulated render time of a miss, ms")
+    parser.add_argument("--backend", choices=BACKENDS, action="append")
+    options = parser.parse_args()
+    for name in options.backend or BACKENDS:
+        run(name, options)
+
+
+if __name__ == "__main__":
+    main()
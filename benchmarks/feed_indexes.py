@@ -0,0 +1,170 @@
+"""Show query plans and latencies of the feed queries before and after the
+feed indexes (posts migration 0002).
+
+A throwaway SQLite database is migrated and seeded with a skewed dataset
+(a few authors, groups and posts get most of the activity). The indexes
+0002 adds are dropped and every query is explained and timed; then they
+are created again and the same queries are run again. Seeding needs the
+current schema, so the rest of it stays as it is.
+
+    python benchmarks/feed_indexes.py --posts 50000 --users 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "yatube.settings")
+
+MIGRATION = "0002_feed_indexes"
+
+
+def setup(path):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = path
+    django.setup()
+
+
+def seed(options):
+    from posts import loadgen
+
+    loadgen.generate(
+        users=options.users, groups=options.groups, posts=options.posts,
+        comments=options.comments, follows=options.follows, images=0,
+        seed=options.seed,
+    )
+
+
+def feed_indexes():
+    """(model, index) pairs added by MIGRATION."""
+    from django.apps import apps
+    from django.db.migrations import AddIndex
+    from django.db.migrations.loader import MigrationLoader
+
+    migration = MigrationLoader(None).get_migration("posts", MIGRATION)
+    return [
+        (apps.get_model("posts", operation.model_name), operation.index)
+        for operation in migration.operations
+        if isinstance(operation, AddIndex)
+    ]
+
+
+def queries(per_page):
+    """(name, queryset) pairs as the views and signals issue them."""
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+
+    from posts import feeds
+    from posts.models import Comment, Follow, Group, Post
+
+    User = get_user_model()
+    # The busiest and a typical author, group and post of the dataset.
+    authors = User.objects.annotate(n=Count("posts")).order_by("-n")
+    groups = Group.objects.annotate(n=Count("group_posts")).order_by("-n")
+    posts = Post.objects.annotate(n=Count("comments")).order_by("-n")
+    followed = User.objects.annotate(n=Count("following")).order_by("-n")
+    picks = {}
+    for name, queryset in (("author", authors), ("group", groups),
+                           ("post", posts), ("followed", followed)):
+        ranked = list(queryset.values_list("id", flat=True))
+        picks[name] = (ranked[0], ranked[len(ranked) // 2])
+
+    result = [("index", feeds.index_feed()[:per_page])]
+    for rank, author_id in zip(("top", "median"), picks["author"]):
+        author = User.objects.get(id=author_id)
+        result.append((f"profile {rank}", feeds.author_feed(author)[:per_page]))
+    for rank, group_id in zip(("top", "median"), picks["group"]):
+        group = Group.objects.get(id=group_id)
+        result.append((f"group {rank}", feeds.group_feed(group)[:per_page]))
+    for rank, post_id in zip(("top", "median"), picks["post"]):
+        result.append((
+            f"comments {rank}",
+            Comment.objects.filter(post_id=post_id).select_related("author")
+            .order_by("created"),
+        ))
+    for rank, author_id in zip(("top", "median"), picks["followed"]):
+        result.append((
+            f"followers {rank}",
+            Follow.objects.filter(author_id=author_id).values_list(
+                "user_id", flat=True
+            ),
+        ))
+    return result
+
+
+def measure(queryset, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset.all())
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def report(title, pairs, options):
+    print(f"== {title}")
+    results = {}
+    for name, queryset in pairs:
+        results[name] = measure(queryset, options.repeat)
+        print(f"-- {name}: {results[name] * 1000:.2f}ms")
+        if not options.no_plans:
+            for line in queryset.explain().splitlines():
+                print(f"   {line}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--groups", type=int, default=50)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--comments", type=int, default=100000)
+    parser.add_argument("--follows", type=int, default=20,
+                        help="mean number of authors a user follows")
+    parser.add_argument("--per-page", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-plans", action="store_true")
+    options = parser.parse_args()
+
+    setup(os.path.join(tempfile.mkdtemp(), "feed_indexes.sqlite3"))
+    from django.core.management import call_command
+    from django.db import connection
+
+    call_command("migrate", verbosity=0)
+    started = time.perf_counter()
+    seed(options)
+    print(f"seeded in {time.perf_counter() - started:.1f}s")
+    pairs = queries(options.per_page)
+    indexes = feed_indexes()
+
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.remove_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    before = report(f"before ({MIGRATION})", pairs, options)
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.add_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    after = report(f"after ({MIGRATION})", pairs, options)
+
+    print("== summary")
+    for name, _ in pairs:
+        print(
+            f"{name:18} {before[name] * 1000:9.2f}ms -> "
+            f"{after[name] * 1000:9.2f}ms  "
+            f"x{before[name] / max(after[name], 1e-9):.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Drive the main views through the test client and report latencies.
+
+Pages, groups, authors, posts and readers are picked from Zipf
+distributions over their popularity, so hot pages are requested far more
+often than cold ones, as on the live site. For every view the script
+prints p50/p95/p99 latency and the number of SQL queries per request.
+
+Run it against a database filled by generate_data:
+
+    python manage.py generate_data --users 100000 --posts 1000000
+    python benchmarks/site_load.py --requests 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "yatube.settings")
+
+VIEWS = ("index", "popular", "group_posts", "profile", "post_view",
+         "follow_index")
+
+
+def setup(database):
+    import django
+    from django.conf import settings
+
+    if database:
+        settings.DATABASES["default"]["NAME"] = database
+    django.setup()
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+
+
+def targets(options, rng):
+    """Map each view to a function returning the next (url, reader)."""
+    from django.db.models import Count
+    from django.urls import reverse
+
+    from posts.loadgen import Zipf
+    from posts.models import Group, Post, Profile, User
+
+    limit = options.population
+    authors = list(Profile.objects.order_by("-posts_count").values_list(
+        "user__username", flat=True
+    )[:limit])
+    groups = list(Group.objects.annotate(n=Count("group_posts")).order_by(
+        "-n"
+    ).values_list("slug", flat=True)[:limit])
+    posts = list(Post.objects.order_by("-comments_count").values_list(
+        "author__username", "id"
+    )[:limit])
+    readers = list(User.objects.filter(
+        profile__followers_count__gt=0
+    ).order_by("-profile__followers_count")[:limit])
+    if not (authors and groups and posts and readers):
+        sys.exit("The database is empty, run generate_data first")
+
+    page = Zipf(range(1, options.pages + 1), options.skew, rng)
+    author = Zipf(authors, options.skew, rng)
+    group = Zipf(groups, options.skew, rng)
+    post = Zipf(posts, options.skew, rng)
+    reader = Zipf(readers, options.skew, rng)
+
+    def paged(url):
+        return f"{url}?page={page()}"
+
+    return {
+        "index": lambda: (paged(reverse("index")), None),
+        "popular": lambda: (paged(reverse("popular")), None),
+        "group_posts": lambda: (
+            paged(reverse("group", kwargs={"slug": group()})), None
+        ),
+        "profile": lambda: (
+            paged(reverse("profile", kwargs={"username": author()})), None
+        ),
+        "post_view": lambda: (reverse("post", args=post()), None),
+        "follow_index": lambda: (paged(reverse("follow_index")), reader()),
+    }
+
+
+def run(view, target, options, clients):
+    from django.core.cache import cache
+    from django.db import connection, reset_queries
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    latencies, queries, errors = [], [], 0
+    for i in range(options.warmup + options.requests):
+        url, reader = target()
+        client = clients.get(reader)
+        if client is None:
+            client = clients[reader] = Client()
+            client.force_login(reader)
+        if options.cold:
+            cache.clear()
+        # CaptureQueriesContext counts within a bounded log, keep it short.
+        reset_queries()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            errors += 1
+        if i >= options.warmup:
+            latencies.append(elapsed)
+            queries.append(len(captured))
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{view:13} {len(latencies):6}  "
+        f"{quantiles[49] * 1000:8.1f} {quantiles[94] * 1000:8.1f} "
+        f"{quantiles[98] * 1000:8.1f}  "
+        f"{statistics.mean(queries):7.1f} {max(queries):5}  {errors:6}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", help="SQLite file to run against")
+    parser.add_argument("--requests", type=int, default=200,
+                        help="measured requests per view")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=20,
+                        help="deepest page number requested")
+    parser.add_argument("--population", type=int, default=1000,
+                        help="most popular authors, groups, posts and "
+                             "readers to draw from")
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--cold", action="store_true",
+                        help="clear the cache before every request")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--view", choices=VIEWS, action="append")
+    options = parser.parse_args()
+
+    setup(options.database)
+    rng = random.Random(options.seed)
+    views = targets(options, rng)
+    # Anonymous requests share one client, readers get one each.
+    from django.test import Client
+
+    clients = {None: Client()}
+    print(f"{'view':13} {'n':>6}  {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  "
+          f"{'queries':>7} {'max':>5}  {'errors':>6}")
+    for view in options.view or VIEWS:
+        run(view, views[view], options, clients)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Mixed read/write load on SQLite with stock and tuned settings.
+
+Worker processes share one database file. Each one loops for --seconds,
+either reading the first page of the index feed or, with probability
+--writes, adding a comment the way add_comment does (read the post, then
+insert inside transaction.atomic). Connections are closed after every
+operation unless CONN_MAX_AGE keeps them, as between requests.
+
+"stock" is Django's sqlite3 backend with its defaults (rollback journal,
+deferred transactions, 5s busy timeout, a new connection per request);
+"tuned" is DATABASES from yatube/settings.py.
+
+    python benchmarks/sqlite_concurrency.py --workers 8 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "yatube.settings")
+
+STOCK = {
+    "ENGINE": "django.db.backends.sqlite3",
+    "CONN_MAX_AGE": 0,
+    "OPTIONS": {},
+}
+
+
+def setup(database):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES["default"] = database
+    settings.DATABASE_REPLICAS = []
+    settings.POST_THUMBNAIL_WORKERS = 0
+    django.setup()
+
+
+def configs():
+    # Read before setup() replaces the default database.
+    from django.conf import settings
+
+    return {"stock": STOCK, "tuned": dict(settings.DATABASES["default"])}
+
+
+def seed(path, options):
+    setup({**STOCK, "NAME": path})
+    from django.core.management import call_command
+
+    from posts import loadgen
+
+    call_command("migrate", verbosity=0)
+    loadgen.generate(
+        users=options.users, groups=5, posts=options.posts,
+        comments=options.posts, follows=5, images=0,
+    )
+    loadgen.rebuild_derived()
+
+
+def worker(database, options, seed):
+    setup(database)
+    from django.db import OperationalError, close_old_connections, transaction
+
+    from posts import feeds
+    from posts.models import Comment, Post, User
+
+    rng = random.Random(seed)
+    post_ids = list(Post.objects.values_list("id", flat=True))
+    user_ids = list(User.objects.values_list("id", flat=True))
+    close_old_connections()
+    latencies = {"read": [], "write": []}
+    errors = 0
+    deadline = time.monotonic() + options.seconds
+    while time.monotonic() < deadline:
+        kind = "write" if rng.random() < options.writes else "read"
+        started = time.perf_counter()
+        try:
+            if kind == "read":
+                list(feeds.index_feed()[:10])
+            else:
+                with transaction.atomic():
+                    post = Post.objects.get(id=rng.choice(post_ids))
+                    Comment.objects.create(
+                        post=post, author_id=rng.choice(user_ids),
+                        text="Нагрузочный комментарий",
+                    )
+        except OperationalError:
+            errors += 1
+        else:
+            latencies[kind].append(time.perf_counter() - started)
+        # The end of a request.
+        close_old_connections()
+    return latencies, errors
+
+
+def run(name, database, options):
+    started = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(options.workers) as pool:
+        results = pool.starmap(worker, [
+            (database, options, seed) for seed in range(options.workers)
+        ])
+    elapsed = time.perf_counter() - started
+    errors = sum(result[1] for result in results)
+    line = [f"{name:6}"]
+    for kind in ("read", "write"):
+        latencies = [l for result in results for l in result[0][kind]]
+        p99 = (statistics.quantiles(latencies, n=100)[98] * 1000
+               if len(latencies) > 1 else float("nan"))
+        line.append(
+            f"{kind}s {len(latencies) / elapsed:7.0f}/s p99 {p99:7.1f}ms"
+        )
+    line.append(f"errors {errors}")
+    print("  ".join(line))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--writes", type=float, default=0.2,
+                        help="share of operations that write")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--config", choices=("stock", "tuned"),
+                        action="append")
+    options = parser.parse_args()
+
+    databases = configs()
+    directory = tempfile.mkdtemp()
+    template = os.path.join(directory, "template.sqlite3")
+    seed(template, options)
+    for name, database in databases.items():
+        if options.config and name not in options.config:
+            continue
+        path = os.path.join(directory, f"{name}.sqlite3")
+        shutil.copy(template, path)
+        run(name, {**database, "NAME": path}, options)
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def username_filter(tmp_path_factory):
+    """Keep the test database's usernames out of the site's filter."""
+    from django.conf import settings
+
+    path = tmp_path_factory.mktemp("usernames") / "usernames.bloom"
+    settings.USERNAME_FILTER_PATH = str(path)
@@ -0,0 +1,119 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+VERSION_PREFIX = "version:"
+CARD_TIMEOUT = 60 * 60
+
+
+def _new_version():
+    # Seeded from the clock so that a version lost to eviction or a
+    # restart never falls back to a number an older fragment was keyed on.
+    return int(time.time() * 1000)
+
+
+def get_versions(*names):
+    keys = [VERSION_PREFIX + name for name in names]
+    found = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def bump(*names):
+    for name in names:
+        key = VERSION_PREFIX + name
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+
+
+def post_card(post_id):
+    return f"post:{post_id}"
+
+
+def post_scopes(post, group_slugs=()):
+    """Generations of every page that lists `post`."""
+    scopes = {"feed", "popular", f"author:{post.author.username}"}
+    if post.group_id:
+        scopes.add(f"group:{post.group.slug}")
+    scopes.update(f"group:{slug}" for slug in group_slugs if slug)
+    return scopes
+
+
+def replica_timeout(timeout, alias):
+    """Cache what was read from a replica only as long as it may lag."""
+    if alias in settings.DATABASE_REPLICAS:
+        return min(timeout, settings.DATABASE_REPLICA_LAG)
+    return timeout
+
+
+def page_key(request, versions):
+    query = hashlib.md5(request.GET.urlencode().encode()).hexdigest()
+    user = 0
+    if request.user.is_authenticated:
+        # Pages of a signed-in user carry CSRF tokens of their form, and
+        # logging in again rotates the secret those are made from.
+        token = request.META.get("CSRF_COOKIE", "")
+        user = f"{request.user.pk}-{hashlib.md5(token.encode()).hexdigest()}"
+    version = ".".join(map(str, versions))
+    return f"page:{request.path}:{query}:{user}:{version}"
+
+
+def add_validators(request, response, etag):
+    """Let browsers and proxies revalidate the page with If-None-Match."""
+    # A replica may render an older page than `etag` stands for, and a
+    # client holding it would then get 304s until the next change.
+    if getattr(request, "read_replica", None) is None:
+        response["ETag"] = etag
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+
+
+def versioned_page(*scopes, store=True):
+    """Serve a view's response until the generation of a scope changes.
+
+    `scopes` are formatted with the view kwargs, e.g. "group:{slug}". The
+    generations alone make the page's ETag, so a matching If-None-Match
+    is answered 304 without touching the database or rendering. Unless
+    `store` is false the response is also cached, so a hit is served
+    from the cache the same way. Responses vary per user because the
+    navigation bar and edit links depend on the viewer, and per CSRF
+    secret because of the forms.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            versions = get_versions(
+                *(scope.format(**kwargs) for scope in scopes)
+            )
+            key = page_key(request, versions)
+            etag = '"%s"' % hashlib.md5(key.encode()).hexdigest()
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+            response = cache.get(key) if store else None
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                add_validators(request, response, etag)
+                if store:
+                    cache.set(key, response, replica_timeout(
+                        settings.PAGE_CACHE_TIMEOUT,
+                        getattr(request, "read_replica", None)
+                    ))
+            return response
+        return wrapper
+    return decorator
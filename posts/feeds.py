@@ -0,0 +1,53 @@
+from . import caching, search
+from .models import Post
+from .timeline import timeline_posts
+
+# Everything post_item.html touches besides the post row itself.
+FEED_RELATED = ("author", "group")
+
+
+def load(queryset):
+    return queryset.select_related(*FEED_RELATED)
+
+
+def index_feed():
+    return load(Post.objects.all())
+
+
+def popular_feed():
+    return load(Post.objects.order_by("-score", "-id"))
+
+
+def group_feed(group):
+    return load(group.group_posts.all())
+
+
+def author_feed(author):
+    return load(author.posts.all())
+
+
+def follow_feed(user):
+    return load(timeline_posts(user))
+
+
+def search_feed(query):
+    return load(search.search(query))
+
+
+def comments(post):
+    return post.comments.select_related("author")
+
+
+def prepare(posts, user):
+    """Attach what post_item.html varies its cached fragment on."""
+    posts = list(posts)
+    versions = caching.get_versions(
+        *(caching.post_card(post.id) for post in posts)
+    )
+    for post, version in zip(posts, versions):
+        post.card_version = version
+        post.card_timeout = caching.replica_timeout(
+            caching.CARD_TIMEOUT, post._state.db
+        )
+        post.editable = user.is_authenticated and post.author_id == user.id
+    return posts
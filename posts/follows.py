@@ -0,0 +1,112 @@
+"""Following many authors at once, and suggested authors.
+
+follow_many() resolves all usernames in one query and inserts the Follow
+rows with a single bulk_create. bulk_create sends no signals, so it also
+does what posts.signals.follow_created does for one follow, batched;
+unfollow_many() does the same for follow_deleted around one DELETE.
+
+Suggestions are friends of friends: authors followed by the authors a user
+follows, ranked by how many of them do. They are precomputed for everybody
+by compute_suggestions (run it periodically) and filtered on read against
+follows made since.
+"""
+import heapq
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from . import caching, counters, timeline
+from .models import Follow, FollowSuggestion, User
+
+
+def resolve(user, usernames):
+    return list(User.objects.filter(
+        username__in=set(usernames)
+    ).exclude(id=user.id).only("id", "username"))
+
+
+def follow_many(user, usernames):
+    """Follow every existing user in `usernames`, return the new authors."""
+    authors = resolve(user, usernames)
+    with transaction.atomic():
+        followed = set(Follow.objects.filter(
+            user=user, author__in=authors
+        ).values_list("author_id", flat=True))
+        authors = [author for author in authors if author.id not in followed]
+        if not authors:
+            return []
+        # The transaction holds the write lock from its start (BEGIN
+        # IMMEDIATE), so nothing can slip in between the check above and
+        # this insert and leave the counters off.
+        Follow.objects.bulk_create(
+            [Follow(user=user, author=author) for author in authors],
+            ignore_conflicts=True,
+        )
+        author_ids = [author.id for author in authors]
+        counters.bump_profile(user.id, followers_count=len(authors))
+        counters.bump_profiles(author_ids, following_count=1)
+        timeline.backfill_many(user.id, author_ids)
+    caching.bump(f"author:{user.username}",
+                 *(f"author:{author.username}" for author in authors))
+    return authors
+
+
+def unfollow_many(user, usernames):
+    """Unfollow every author in `usernames`, return the ones unfollowed."""
+    with transaction.atomic():
+        follows = list(Follow.objects.filter(
+            user=user, author__username__in=set(usernames)
+        ).select_related("author"))
+        if not follows:
+            return []
+        # One DELETE without follow_deleted for every row; what it does is
+        # done below for all of them at once.
+        deleted = Follow.objects.filter(id__in=[f.id for f in follows])
+        deleted._raw_delete(deleted.db)
+        authors = [follow.author for follow in follows]
+        author_ids = [author.id for author in authors]
+        counters.bump_profile(user.id, followers_count=-len(authors))
+        counters.bump_profiles(author_ids, following_count=-1)
+        timeline.prune_many(user.id, author_ids)
+    caching.bump(f"author:{user.username}",
+                 *(f"author:{author.username}" for author in authors))
+    return authors
+
+
+def compute_suggestions(limit=None, batch_size=5000):
+    limit = limit or settings.FOLLOW_SUGGESTIONS
+    following = defaultdict(set)
+    for user_id, author_id in Follow.objects.values_list(
+        "user_id", "author_id"
+    ).iterator():
+        following[user_id].add(author_id)
+    rows = []
+    for user_id, authors in following.items():
+        scores = Counter()
+        for author_id in authors:
+            scores.update(following.get(author_id, ()))
+        scores.pop(user_id, None)
+        for author_id in authors:
+            scores.pop(author_id, None)
+        best = heapq.nsmallest(
+            limit, scores.items(), key=lambda item: (-item[1], item[0])
+        )
+        rows.extend(
+            FollowSuggestion(user_id=user_id, author_id=author_id,
+                             score=score)
+            for author_id, score in best
+        )
+    # The transaction holds the write lock (BEGIN IMMEDIATE), so it only
+    # swaps the rows; the computation above runs outside of it.
+    with transaction.atomic():
+        FollowSuggestion.objects.all().delete()
+        FollowSuggestion.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def suggestions(user, limit=None):
+    return FollowSuggestion.objects.filter(user=user).exclude(
+        # Followed since the suggestions were computed.
+        author__following__user=user
+    ).select_related("author")[:limit or settings.FOLLOW_SUGGESTIONS]
@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from posts import images
 from posts.models import Comment, Post
 
 
@@ -9,6 +11,13 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ["group", "text", "image"]
 
+    def clean_image(self):
+        image = self.cleaned_data.get("image")
+        # Only fresh uploads; an edit without a new file keeps the old one.
+        if isinstance(image, UploadedFile):
+            return images.normalize(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
 
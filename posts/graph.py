@@ -0,0 +1,176 @@
+"""Offline metrics of the follower graph, stored on Profile.
+
+export() dumps Follow into CSR arrays on disk: users are numbered by the
+position of their id in ids.npy, and the followers of user i are
+indices[indptr[i]:indptr[i + 1]]. The arrays are memory-mapped, so the
+metrics below are computed over them with NumPy without loading the
+Follow table into Python objects:
+
+- pagerank: PageRank of following as a vote for the author;
+- mutual_count: how many users the user follows back;
+- reach: followers plus followers of followers.
+
+Run it periodically with the analyze_graph command.
+"""
+import os
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import counters
+from .models import Follow, Profile, User
+
+CHUNK_SIZE = 1 << 16
+
+
+class Graph:
+    def __init__(self, ids, indptr, indices):
+        self.ids, self.indptr, self.indices = ids, indptr, indices
+        self.size = len(ids)
+        self.in_degree = np.diff(indptr)
+        self.out_degree = np.bincount(indices, minlength=self.size)
+        # Author of every edge, parallel to indices.
+        self.targets = np.repeat(
+            np.arange(self.size, dtype=indices.dtype), self.in_degree
+        )
+
+
+def snapshot():
+    """A read-only transaction that does not take the write lock."""
+    # Plain atomic() is BEGIN IMMEDIATE on yatube.backends.sqlite3 and
+    # would block every write on the site for the whole export.
+    read_transaction = getattr(connection, "read_transaction", None)
+    return read_transaction() if read_transaction else transaction.atomic()
+
+
+def path(directory, name):
+    return os.path.join(directory, f"{name}.npy")
+
+
+def export(directory=None):
+    """Write the Follow table to `directory` and return it as a Graph."""
+    directory = directory or settings.GRAPH_ROOT
+    os.makedirs(directory, exist_ok=True)
+    # One snapshot for the users and every follow.
+    with snapshot():
+        ids = np.fromiter(
+            User.objects.order_by("id").values_list("id", flat=True)
+            .iterator(), dtype=np.int64
+        )
+        count = Follow.objects.count()
+        dtype = np.int32 if len(ids) < 2 ** 31 else np.int64
+        indices = np.lib.format.open_memmap(
+            path(directory, "indices"), mode="w+", dtype=dtype,
+            shape=(count,)
+        )
+        in_degree = np.zeros(len(ids), dtype=np.int64)
+        # In the order of follow_author_user_idx, i.e. already CSR order.
+        rows = Follow.objects.order_by("author_id", "user_id").values_list(
+            "author_id", "user_id"
+        ).iterator(chunk_size=CHUNK_SIZE)
+        position = 0
+        while True:
+            chunk = np.array(list(islice(rows, CHUNK_SIZE)), dtype=np.int64)
+            if not len(chunk):
+                break
+            authors, followers = np.searchsorted(ids, chunk.T)
+            in_degree += np.bincount(authors, minlength=len(ids))
+            indices[position:position + len(chunk)] = followers
+            position += len(chunk)
+    indices.flush()
+    indptr = np.concatenate(([0], np.cumsum(in_degree)))
+    np.save(path(directory, "ids"), ids)
+    np.save(path(directory, "indptr"), indptr)
+    return Graph(ids, indptr, indices)
+
+
+def load(directory=None):
+    directory = directory or settings.GRAPH_ROOT
+    return Graph(*(
+        np.load(path(directory, name), mmap_mode="r")
+        for name in ("ids", "indptr", "indices")
+    ))
+
+
+def pagerank(graph, damping=0.85, tolerance=1e-6, max_iterations=100):
+    n = graph.size
+    if not n:
+        return np.zeros(0)
+    rank = np.full(n, 1 / n)
+    dangling = graph.out_degree == 0
+    out_degree = np.maximum(graph.out_degree, 1)
+    for _ in range(max_iterations):
+        votes = np.bincount(
+            graph.targets, weights=(rank / out_degree)[graph.indices],
+            minlength=n
+        )
+        # Users who follow nobody spread their rank over everybody.
+        leaked = rank[dangling].sum() / n
+        new = (1 - damping) / n + damping * (votes + leaked)
+        done = np.abs(new - rank).sum() < tolerance
+        rank = new
+        if done:
+            break
+    return rank
+
+
+def mutual_counts(graph):
+    n = graph.size
+    if not len(graph.indices):
+        return np.zeros(n, dtype=np.int64)
+    # Sorted, as edges are grouped by author, then by follower.
+    keys = graph.targets.astype(np.int64) * n + graph.indices
+    reverse = graph.indices.astype(np.int64) * n + graph.targets
+    found = np.minimum(np.searchsorted(keys, reverse), len(keys) - 1)
+    mutual = keys[found] == reverse
+    return np.bincount(graph.targets[mutual], minlength=n)
+
+
+def reach(graph, budget=1 << 22):
+    """Count distinct followers and followers of followers of everybody.
+
+    Authors are processed in blocks of at most `budget` two-hop paths (one
+    author with more is a block of its own), which bounds memory use.
+    """
+    n, indptr, indices = graph.size, graph.indptr, graph.indices
+    paths = graph.in_degree + np.bincount(
+        graph.targets, weights=graph.in_degree[indices], minlength=n
+    ).astype(np.int64)
+    counts = np.zeros(n, dtype=np.int64)
+    start = 0
+    ends = np.cumsum(paths)
+    while start < n:
+        offset = ends[start - 1] if start else 0
+        end = max(np.searchsorted(ends, offset + budget, "right"), start + 1)
+        edges = slice(indptr[start], indptr[end])
+        authors, followers = graph.targets[edges], indices[edges]
+        # Followers of every follower, gathered from their CSR slices.
+        lengths = graph.in_degree[followers]
+        steps = np.arange(lengths.sum()) - np.repeat(
+            np.cumsum(lengths) - lengths, lengths
+        )
+        second = indices[np.repeat(indptr[followers], lengths) + steps]
+        owners = np.concatenate((authors, np.repeat(authors, lengths)))
+        reached = np.concatenate((followers, second))
+        keys = owners.astype(np.int64) * n + reached
+        # Nobody is in their own audience.
+        keys = np.sort(keys[owners != reached])
+        # Sorting and dropping repeats is much faster than np.unique.
+        first = np.ones(len(keys), dtype=bool)
+        np.not_equal(keys[1:], keys[:-1], out=first[1:])
+        counts += np.bincount(keys[first] // n, minlength=n)
+        start = end
+    return counts
+
+
+def store(graph, ranks, mutual, reached):
+    """Write the metrics to Profile, return the number of rows updated."""
+    # Users who signed up after the export are left for the next run.
+    rows = zip(ranks.tolist(), mutual.tolist(), reached.tolist(),
+               graph.ids.tolist())
+    with transaction.atomic():
+        return counters.update_rows(
+            Profile, ["pagerank", "mutual_count", "reach"], rows
+        )
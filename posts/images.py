@@ -0,0 +1,68 @@
+"""Bounded processing of uploaded post images.
+
+Pillow only reads the header on open(), so the pixel size is checked before
+anything is decoded. JPEGs are then decoded straight at a reduced scale
+with draft(), so memory use depends on POST_IMAGE_MAX_PIXELS rather than on
+the size of the original. The result is re-encoded without metadata.
+"""
+import io
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+TOO_LARGE = "Изображение слишком большое."
+BROKEN = "Загрузите правильное изображение."
+
+
+def _open(upload):
+    if upload.size > settings.POST_IMAGE_MAX_BYTES:
+        raise ValidationError(TOO_LARGE, code="too_large")
+    upload.seek(0)
+    try:
+        return Image.open(upload)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError(BROKEN, code="invalid_image")
+
+
+def normalize(upload):
+    """Return `upload` re-encoded to at most POST_IMAGE_MAX_SIDE pixels."""
+    image = _open(upload)
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    if image.format == "GIF" and getattr(image, "is_animated", False):
+        # Keep animations as uploaded as long as they are small enough.
+        if max(image.size) <= max_side:
+            upload.seek(0)
+            return upload
+    if image.format == "JPEG":
+        image.draft("RGB", (max_side, max_side))
+    if image.width * image.height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(TOO_LARGE, code="too_large")
+    try:
+        image.load()
+        image = ImageOps.exif_transpose(image)
+        factor = max(image.size) // max_side
+        if factor > 1:
+            image = image.reduce(factor)
+        image.thumbnail((max_side, max_side))
+    except (OSError, ValueError, Image.DecompressionBombError):
+        raise ValidationError(BROKEN, code="invalid_image")
+
+    if image.mode in ("RGBA", "LA", "P", "PA"):
+        image_format, extension, options = "PNG", "png", {"optimize": True}
+    else:
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image_format, extension, options = "JPEG", "jpg", {
+            "quality": settings.POST_IMAGE_QUALITY, "optimize": True
+        }
+    content = io.BytesIO()
+    # No exif/icc arguments: metadata is dropped.
+    image.save(content, image_format, **options)
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    return SimpleUploadedFile(
+        f"{name}.{extension}", content.getvalue(),
+        content_type=Image.MIME[image_format]
+    )
@@ -0,0 +1,200 @@
+"""Synthetic data for load tests and benchmarks.
+
+Rows are written with bulk_create in batches, so no signals fire;
+everything the signals would maintain (profiles and counters, timelines,
+the search index) is rebuilt in one pass at the end. Authors, groups,
+commented posts and followed authors are drawn from Zipf distributions,
+so a few of each get most of the activity, as on a real site.
+"""
+import bisect
+import io
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from . import counters, ranking, search, timeline, usernames
+from .models import Comment, Follow, Group, Post, User
+
+WORDS = """
+    котик пёс прогулка город море лес утро вечер дождь солнце книга кофе
+    работа отпуск поезд дорога друзья музыка концерт фильм кино театр
+    выставка парк река горы снег зима лето осень весна обед ужин рецепт
+    пирог суп сад цветы велосипед бег спорт футбол проект код релиз ошибка
+    сервер база запрос страница новость история фото картинка
+""".split()
+
+
+class Zipf:
+    """Draw items of `population`, the first ones the most often."""
+
+    def __init__(self, population, skew, rng):
+        self.population = population
+        self.rng = rng
+        self.cum_weights = list(accumulate(
+            1 / rank ** skew for rank in range(1, len(population) + 1)
+        ))
+
+    def __call__(self):
+        point = self.rng.random() * self.cum_weights[-1]
+        return self.population[bisect.bisect(self.cum_weights, point)]
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Let bulk_create keep the dates set on auto_now_add fields."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def insert(model, objects, batch_size, **options):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return
+        with transaction.atomic():
+            model.objects.bulk_create(batch, **options)
+
+
+def make_images(count, prefix, rng):
+    storage = Post._meta.get_field("image").storage
+    names = []
+    for i in range(count):
+        color = tuple(rng.randrange(256) for _ in range(3))
+        content = io.BytesIO()
+        Image.new("RGB", (1200, 800), color).save(content, "JPEG")
+        names.append(storage.save(
+            f"posts/{prefix}-{i}.jpg", ContentFile(content.getvalue())
+        ))
+    return names
+
+
+def generate(users=1000, groups=20, posts=10000, comments=20000, follows=20,
+             images=0.1, image_pool=20, skew=1.1, days=365, prefix="load",
+             seed=1, batch_size=2000, log=None):
+    """Create the given number of rows and return the totals per model.
+
+    `follows` is the mean number of authors a user follows and `images` the
+    share of posts with a picture, taken from `image_pool` generated JPEGs.
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    now = timezone.now()
+    span = days * 86400
+
+    log(f"Creating {users} users")
+    password = make_password(None)
+    insert(User, (
+        User(username=f"{prefix}{i}", password=password, date_joined=now)
+        for i in range(users)
+    ), batch_size, ignore_conflicts=True)
+    user_ids = list(User.objects.filter(
+        username__startswith=prefix
+    ).order_by("id").values_list("id", flat=True))
+    # Which users turn out popular should not depend on their ids.
+    rng.shuffle(user_ids)
+
+    log(f"Creating {groups} groups")
+    insert(Group, (
+        Group(title=f"Группа {i}", slug=f"{prefix}-{i}",
+              description=" ".join(rng.sample(WORDS, 10)))
+        for i in range(groups)
+    ), batch_size, ignore_conflicts=True)
+    group_ids = list(Group.objects.filter(
+        slug__startswith=f"{prefix}-"
+    ).values_list("id", flat=True))
+
+    log(f"Creating {posts} posts")
+    author = Zipf(user_ids, skew, rng)
+    group = Zipf(group_ids, skew, rng) if group_ids else lambda: None
+    image_names = make_images(image_pool, prefix, rng) if images else []
+
+    def make_post(i):
+        return Post(
+            text=" ".join(rng.choices(WORDS, k=rng.randint(5, 40))),
+            author_id=author(),
+            group_id=group() if rng.random() < 0.5 else None,
+            image=rng.choice(image_names)
+            if image_names and rng.random() < images else None,
+            pub_date=now - timedelta(seconds=rng.randrange(span)),
+        )
+
+    first_post = Post.objects.order_by("-id").values_list("id", flat=True)
+    first_post = (first_post.first() or 0) + 1
+    with explicit_dates(Post._meta.get_field("pub_date")):
+        insert(Post, (make_post(i) for i in range(posts)), batch_size)
+    # Newer posts are the ones that get commented on.
+    post_dates = list(Post.objects.filter(id__gte=first_post).order_by(
+        "-pub_date"
+    ).values_list("id", "pub_date"))
+
+    if not post_dates:
+        comments = 0
+    log(f"Creating {comments} comments")
+    commented = Zipf(post_dates, skew, rng) if post_dates else None
+
+    def make_comment(i):
+        post_id, pub_date = commented()
+        return Comment(
+            post_id=post_id,
+            author_id=rng.choice(user_ids),
+            text=" ".join(rng.choices(WORDS, k=rng.randint(3, 15))),
+            created=min(now, pub_date + timedelta(
+                seconds=rng.randrange(2 * 86400)
+            )),
+        )
+
+    with explicit_dates(Comment._meta.get_field("created")):
+        insert(Comment, (make_comment(i) for i in range(comments)),
+               batch_size)
+
+    log(f"Creating about {follows * users} follows")
+    followed = Zipf(user_ids, skew, rng)
+
+    def make_follows():
+        for user_id in user_ids:
+            authors = {followed() for _ in range(
+                int(rng.expovariate(1 / follows)) if follows else 0
+            )}
+            authors.discard(user_id)
+            for author_id in authors:
+                yield Follow(user_id=user_id, author_id=author_id)
+
+    insert(Follow, make_follows(), batch_size, ignore_conflicts=True)
+    return {
+        model.__name__: model.objects.count()
+        for model in (User, Group, Post, Comment, Follow)
+    }
+
+
+def rebuild_derived(log=None):
+    """Bring everything bulk_create skipped in line with the new rows."""
+    log = log or (lambda message: None)
+    log("Reconciling counters")
+    counters.reconcile_profiles()
+    counters.reconcile_comments()
+    cache.delete(timeline.CELEBRITIES_CACHE_KEY)
+    log("Rebuilding timelines")
+    timeline.rebuild()
+    log("Rebuilding the search index")
+    search.rebuild()
+    log("Rebuilding the username filter")
+    usernames.rebuild()
+    log("Scoring posts")
+    ranking.rescore(window=0)
+    # Cached pages and cards are keyed on versions that know nothing of
+    # the new rows.
+    cache.clear()
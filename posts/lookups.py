@@ -0,0 +1,97 @@
+"""Read-through cache of the users, groups and posts views look up.
+
+get_user(), get_group() and get_post() answer from the cache and fall
+back to the database, raising Http404 like get_object_or_404. posts.signals
+forgets an object whenever it is saved or deleted. A renamed user or group
+stays reachable under the old name until OBJECT_CACHE_TIMEOUT runs out,
+unless the name is taken again (creating the new owner forgets it).
+
+Objects are read-only snapshots: a view that saves what it looked up must
+load it from the database, or it would write stale counters back.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from .caching import replica_timeout
+from .models import Group, Post, User
+
+PREFIX = "object:"
+# Enough for pages and links; the password hash stays out of the cache.
+USER_FIELDS = ("id", "username", "first_name", "last_name")
+
+
+def user_key(username):
+    return f"{PREFIX}user:{username}"
+
+
+def group_key(slug):
+    return f"{PREFIX}group:{slug}"
+
+
+def group_id_key(group_id):
+    return f"{PREFIX}group-id:{group_id}"
+
+
+def post_key(post_id):
+    return f"{PREFIX}post:{post_id}"
+
+
+def store(key, obj):
+    # An object read from a lagging replica may predate the last forget().
+    cache.set(key, obj, replica_timeout(
+        settings.OBJECT_CACHE_TIMEOUT, obj._state.db
+    ))
+
+
+def read_through(key, queryset, **lookup):
+    obj = cache.get(key)
+    if obj is None:
+        try:
+            obj = queryset.get(**lookup)
+        except queryset.model.DoesNotExist:
+            raise Http404(f"No {queryset.model._meta.object_name} matches")
+        store(key, obj)
+    return obj
+
+
+def get_user(username):
+    return read_through(
+        user_key(username), User.objects.only(*USER_FIELDS),
+        username=username
+    )
+
+
+def get_group(slug):
+    return read_through(group_key(slug), Group.objects.all(), slug=slug)
+
+
+def get_post(username, post_id):
+    """The post with its author and group, if `username` wrote it."""
+    keys = [post_key(post_id), user_key(username)]
+    found = cache.get_many(keys)
+    post = found.get(keys[0]) or read_through(
+        keys[0], Post.objects.all(), id=post_id
+    )
+    author = found.get(keys[1]) or get_user(username)
+    if post.author_id != author.id:
+        raise Http404("No Post matches")
+    post.author = author
+    if post.group_id:
+        post.group = read_through(
+            group_id_key(post.group_id), Group.objects.all(),
+            id=post.group_id
+        )
+    return post
+
+
+def forget_user(user):
+    cache.delete(user_key(user.username))
+
+
+def forget_group(group):
+    cache.delete_many([group_key(group.slug), group_id_key(group.id)])
+
+
+def forget_post(post_id):
+    cache.delete(post_key(post_id))
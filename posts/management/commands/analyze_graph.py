@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import graph
+
+
+class Command(BaseCommand):
+    help = "Compute PageRank, mutual follows and reach of every user"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--directory",
+            help="Where to keep the graph arrays (default GRAPH_ROOT)",
+        )
+        parser.add_argument(
+            "--reuse", action="store_true",
+            help="Use the arrays of the previous run instead of exporting",
+        )
+
+    def handle(self, *args, directory=None, reuse=False, **options):
+        started = time.monotonic()
+        data = graph.load(directory) if reuse else graph.export(directory)
+        self.stdout.write(
+            f"{data.size} users, {len(data.indices)} follows "
+            f"({time.monotonic() - started:.1f}s)"
+        )
+        ranks = graph.pagerank(data)
+        mutual = graph.mutual_counts(data)
+        reached = graph.reach(data)
+        self.stdout.write(f"Computed ({time.monotonic() - started:.1f}s)")
+        count = graph.store(data, ranks, mutual, reached)
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {count} profiles ({time.monotonic() - started:.1f}s)"
+        ))
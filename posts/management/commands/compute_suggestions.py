@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import follows
+
+
+class Command(BaseCommand):
+    help = "Recompute friends-of-friends follow suggestions for every user"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int,
+            help="Suggestions kept per user (default FOLLOW_SUGGESTIONS)",
+        )
+
+    def handle(self, *args, limit=None, **options):
+        count = follows.compute_suggestions(limit)
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} suggestions"))
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from posts import loadgen
+
+
+class Command(BaseCommand):
+    help = "Fill the database with synthetic users, posts and follows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--groups", type=int, default=20)
+        parser.add_argument("--posts", type=int, default=10000)
+        parser.add_argument("--comments", type=int, default=20000)
+        parser.add_argument(
+            "--follows", type=int, default=20,
+            help="Mean number of authors a user follows",
+        )
+        parser.add_argument(
+            "--images", type=float, default=0.1,
+            help="Share of posts with a picture",
+        )
+        parser.add_argument("--image-pool", type=int, default=20)
+        parser.add_argument(
+            "--skew", type=float, default=1.1,
+            help="Zipf exponent of authors, groups, comments and follows",
+        )
+        parser.add_argument(
+            "--days", type=int, default=365,
+            help="Spread posts over this many days back",
+        )
+        parser.add_argument(
+            "--prefix", default="load",
+            help="Prefix of generated usernames and group slugs",
+        )
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--skip-derived", action="store_true",
+            help="Do not rebuild counters, timelines and the search index",
+        )
+
+    def handle(self, *args, skip_derived=False, **options):
+        log = self.stdout.write if options["verbosity"] else None
+        totals = loadgen.generate(
+            users=options["users"],
+            groups=options["groups"],
+            posts=options["posts"],
+            comments=options["comments"],
+            follows=options["follows"],
+            images=options["images"],
+            image_pool=options["image_pool"],
+            skew=options["skew"],
+            days=options["days"],
+            prefix=options["prefix"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            log=log,
+        )
+        if not skip_derived:
+            loadgen.rebuild_derived(log=log)
+        self.stdout.write(self.style.SUCCESS(", ".join(
+            f"{name}: {count}" for name, count in totals.items()
+        )))
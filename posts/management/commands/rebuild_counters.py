@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = "Reconcile denormalized post, follower and comment counters"
+
+    def handle(self, *args, **options):
+        profiles = counters.reconcile_profiles()
+        posts = counters.reconcile_comments()
+        self.stdout.write(self.style.SUCCESS(
+            f"Fixed {profiles} profiles and {posts} posts"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = "Rebuild materialized home timelines from the Follow table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", dest="user_ids", type=int, action="append",
+            help="Rebuild only this user's timeline (repeatable)",
+        )
+
+    def handle(self, *args, user_ids=None, **options):
+        timeline.rebuild(user_ids)
+        self.stdout.write(self.style.SUCCESS("Timelines rebuilt"))
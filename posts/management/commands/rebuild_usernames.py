@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import usernames
+
+
+class Command(BaseCommand):
+    help = "Rewrite the filter of existing usernames from the User table"
+
+    def handle(self, *args, **options):
+        count = usernames.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Username filter rebuilt with {count} users"
+        ))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from yatube import replication
+
+
+class Command(BaseCommand):
+    help = "Copy the default database to the read replicas"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float,
+            help="Keep copying every this many seconds",
+        )
+
+    def handle(self, *args, interval=None, **options):
+        while True:
+            count = replication.sync()
+            if options["verbosity"] > 1 or interval is None:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Copied to {count} replicas"
+                ))
+            if interval is None:
+                return
+            time.sleep(interval)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import ranking
+
+
+class Command(BaseCommand):
+    help = "Refresh the scores that order the popular feed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Rescore every post, not only the last POPULAR_WINDOW",
+        )
+
+    def handle(self, *args, all=False, **options):
+        count = ranking.rescore(window=0 if all else None)
+        self.stdout.write(self.style.SUCCESS(f"Rescored {count} posts"))
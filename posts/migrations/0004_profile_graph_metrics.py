@@ -0,0 +1,28 @@
+# Generated by Django 2.2.6 on 2026-10-17 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='mutual_count',
+            field=models.PositiveIntegerField(default=0, help_text='Число взаимных подписок'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='pagerank',
+            field=models.FloatField(db_index=True, default=0, help_text='PageRank в графе подписок'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='reach',
+            field=models.PositiveIntegerField(default=0, help_text='Подписчики и подписчики подписчиков'),
+        ),
+    ]
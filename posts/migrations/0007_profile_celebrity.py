@@ -0,0 +1,28 @@
+# Generated by Django 2.2.28 on 2026-10-17 06:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_celebrities(apps, schema_editor):
+    # Authors over the limit were merged on read by their counter so far.
+    Profile = apps.get_model('posts', 'Profile')
+    Profile.objects.filter(
+        following_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).update(celebrity=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_timeline_entry_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='celebrity',
+            field=models.BooleanField(db_index=True, default=False, help_text='Записи подмешиваются в ленты подписчиков при чтении'),
+        ),
+        migrations.RunPython(mark_celebrities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.28 on 2026-10-17 06:01
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+
+
+def count_by(queryset, field):
+    return dict(
+        queryset.values_list(field).annotate(n=Count('id')).order_by()
+    )
+
+
+def create_missing_profiles(apps, schema_editor):
+    # Users from before 0001 have no profile; give them exact counts.
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Profile = apps.get_model('posts', 'Profile')
+    Post = apps.get_model('posts', 'Post')
+    Follow = apps.get_model('posts', 'Follow')
+    user_ids = list(
+        User.objects.filter(profile__isnull=True).values_list('id', flat=True)
+    )
+    posts = count_by(Post.objects.filter(author_id__in=user_ids), 'author_id')
+    followers = count_by(
+        Follow.objects.filter(user_id__in=user_ids), 'user_id'
+    )
+    following = count_by(
+        Follow.objects.filter(author_id__in=user_ids), 'author_id'
+    )
+    Profile.objects.bulk_create(
+        [Profile(
+            user_id=user_id,
+            posts_count=posts.get(user_id, 0),
+            followers_count=followers.get(user_id, 0),
+            following_count=following.get(user_id, 0),
+            celebrity=(following.get(user_id, 0)
+                       > settings.TIMELINE_FANOUT_LIMIT),
+        ) for user_id in user_ids],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_profile_celebrity'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_missing_profiles, migrations.RunPython.noop
+        ),
+    ]
@@ -16,8 +16,7 @@ class Group(models.Model):
 class Post(models.Model):
     text = models.TextField(
         help_text="Текст новой записи",
-        verbose_name="Текст поста",
-        db_index=True
+        verbose_name="Текст поста"
     )
     pub_date = models.DateTimeField("date published", auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE,
@@ -29,12 +28,27 @@ class Post(models.Model):
     )
     image = models.ImageField(upload_to="posts/", blank=True, null=True,
                               verbose_name="Картинка")
+    comments_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Комментариев"
+    )
+    # Order of the popular feed, see posts.ranking.
+    score = models.FloatField(default=0, editable=False)
 
     def __str__(self):
         return self.text[:15]
 
     class Meta:
-        ordering = ("-pub_date",)
+        # id breaks ties between posts published in the same instant, which
+        # keyset pagination needs.
+        ordering = ("-pub_date", "-id")
+        indexes = [
+            models.Index(fields=["-pub_date", "-id"], name="post_date_idx"),
+            models.Index(fields=["author", "-pub_date", "-id"],
+                         name="post_author_date_idx"),
+            models.Index(fields=["group", "-pub_date", "-id"],
+                         name="post_group_date_idx"),
+            models.Index(fields=["-score", "-id"], name="post_score_idx"),
+        ]
 
 
 class Comment(models.Model):
@@ -47,6 +61,12 @@ class Comment(models.Model):
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["post", "created"],
+                         name="comment_post_created_idx"),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -62,3 +82,100 @@ class Follow(models.Model):
                 fields=["user", "author"], name="unique_following"
             )
         ]
+        # unique_following serves lookups by user, this one by author.
+        indexes = [
+            models.Index(fields=["author", "user"], name="follow_author_user_idx"),
+        ]
+
+
+class FollowSuggestion(models.Model):
+    """An author followed by people `user` follows, see posts.follows."""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="follow_suggestions"
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+"
+    )
+    # How many of the authors `user` follows follow `author`.
+    score = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ("-score", "author_id")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "author"], name="unique_follow_suggestion"
+            )
+        ]
+
+
+class SearchToken(models.Model):
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="search_tokens"
+    )
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["term", "post"], name="unique_search_token"
+            )
+        ]
+
+
+class Profile(models.Model):
+    """Denormalized counters of a user, kept in sync by posts.signals."""
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        related_name="profile"
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    # Same naming as the related managers: user.follower / user.following.
+    followers_count = models.PositiveIntegerField(
+        default=0, help_text="Число подписок пользователя"
+    )
+    following_count = models.PositiveIntegerField(
+        default=0, help_text="Число подписчиков пользователя"
+    )
+    # Computed offline by posts.graph.
+    pagerank = models.FloatField(
+        default=0, db_index=True, help_text="PageRank в графе подписок"
+    )
+    mutual_count = models.PositiveIntegerField(
+        default=0, help_text="Число взаимных подписок"
+    )
+    reach = models.PositiveIntegerField(
+        default=0, help_text="Подписчики и подписчики подписчиков"
+    )
+    # Set by posts.timeline, cleared by its full rebuild.
+    celebrity = models.BooleanField(
+        default=False, db_index=True,
+        help_text="Записи подмешиваются в ленты подписчиков при чтении"
+    )
+
+    def __str__(self):
+        return str(self.user)
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="timeline"
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="timeline"
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ("-pub_date", "-post")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="unique_timeline_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="timeline_user_date_idx",
+            )
+        ]
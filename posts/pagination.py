@@ -0,0 +1,205 @@
+import base64
+import datetime
+import hashlib
+import json
+import math
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+FEED_ORDERING = ("-pub_date", "-id")
+COMMENT_ORDERING = ("created", "id")
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder truncates datetimes to milliseconds, which would
+    # make the keyset skip or repeat rows created within the same ms.
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, reverse=False):
+    payload = json.dumps([int(reverse), *values], cls=CursorEncoder)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def ordering_of(queryset):
+    """The order_by() a feed was built with, FEED_ORDERING by default."""
+    return tuple(queryset.query.order_by) or FEED_ORDERING
+
+
+def cursor_after(obj, ordering=FEED_ORDERING):
+    """Cursor of what follows `obj` in `ordering`."""
+    return encode_cursor([getattr(obj, name.lstrip("-")) for name in ordering])
+
+
+def finite(text):
+    # Keys are ids, dates and scores; NaN and infinities only come from
+    # tampered cursors and break the conversion to database values.
+    number = float(text)
+    if not math.isfinite(number):
+        raise ValueError(text)
+    return number
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        reverse, *values = json.loads(
+            base64.urlsafe_b64decode(padded),
+            parse_float=finite, parse_constant=finite,
+        )
+    except (TypeError, ValueError):
+        raise InvalidCursor(cursor)
+    return values, bool(reverse)
+
+
+class CursorPage(Sequence):
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return "<Cursor page of %s items>" % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset pagination: every page is a bounded range read on `ordering`.
+
+    `ordering` must end with a unique field so that the key is total; it
+    defaults to the queryset's own order_by(). There is no COUNT(*) and
+    no OFFSET, so page 5000 costs the same as page 1.
+    """
+
+    def __init__(self, object_list, per_page, ordering=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = ordering or ordering_of(object_list)
+        self.fields = [name.lstrip("-") for name in self.ordering]
+
+    def _seek(self, values, reverse):
+        # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y), per direction.
+        condition = Q()
+        for index, name in enumerate(self.ordering):
+            descending = name.startswith("-") != reverse
+            lookup = "lt" if descending else "gt"
+            step = Q(**{f"{self.fields[index]}__{lookup}": values[index]})
+            for field, value in zip(self.fields[:index], values):
+                step &= Q(**{field: value})
+            condition |= step
+        return condition
+
+    def _key(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+
+    def page(self, cursor=None):
+        values, reverse = decode_cursor(cursor) if cursor else ([], False)
+        if values and len(values) != len(self.fields):
+            raise InvalidCursor(cursor)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [
+                name[1:] if name.startswith("-") else f"-{name}"
+                for name in ordering
+            ]
+        queryset = self.object_list.order_by(*ordering)
+        if values:
+            try:
+                queryset = queryset.filter(self._seek(values, reverse))
+            except (ValidationError, ValueError, TypeError, OverflowError):
+                raise InvalidCursor(cursor)
+        try:
+            items = list(queryset[:self.per_page + 1])
+        except OverflowError:
+            # A tampered key too big for the database's integers.
+            raise InvalidCursor(cursor)
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if reverse:
+            items.reverse()
+
+        next_cursor = previous_cursor = None
+        if items:
+            if has_more or reverse:
+                next_cursor = encode_cursor(self._key(items[-1]))
+            if has_more if reverse else values:
+                previous_cursor = encode_cursor(
+                    self._key(items[0]), reverse=True
+                )
+        return CursorPage(items, self, next_cursor, previous_cursor)
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+
+def approximate_count(queryset):
+    """COUNT(*) of `queryset`, cached once it reaches COUNT_CACHE_MIN.
+
+    Small counts stay exact. Big ones are recounted every
+    COUNT_CACHE_TIMEOUT seconds, so the last page number of a huge feed
+    may be off by the posts of the last minute, and the query runs once a
+    minute instead of on every page view.
+    """
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    key = "count:" + hashlib.md5(
+        f"{queryset.db}:{sql}:{params}".encode()
+    ).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        if count >= settings.COUNT_CACHE_MIN:
+            cache.set(key, count, settings.COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def paginate(request, object_list, per_page):
+    """Return (paginator, page) for a feed.
+
+    Numbered pages are the default; `?cursor=` opts into keyset pagination
+    in the order of `object_list`.
+    """
+    if "cursor" in request.GET:
+        paginator = CursorPaginator(object_list, per_page)
+        return paginator, paginator.get_page(request.GET.get("cursor"))
+    paginator = Paginator(object_list, per_page)
+    # Paginator.count is a cached_property: fill it instead of subclassing,
+    # views and templates expect a plain Paginator.
+    paginator.__dict__["count"] = approximate_count(object_list)
+    return paginator, paginator.get_page(request.GET.get("page"))
@@ -0,0 +1,72 @@
+"""Scores of the popular feed.
+
+A post is as popular as its engagement (comments, and followers of its
+author), halved every POPULAR_HALF_LIFE seconds since it was published.
+Two posts compare the same way at any moment as their
+
+    log2(1 + engagement) + pub_date / POPULAR_HALF_LIFE
+
+does, which does not depend on the current time. That is Post.score: it
+is indexed, so the popular feed is a range read like the index, and it
+only changes with engagement. rescore() refreshes the posts of the last
+POPULAR_WINDOW seconds; older ones would need their engagement to grow
+manyfold to move.
+"""
+import math
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import caching, counters
+from .models import Post, Profile
+
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+# Differences below this are rounding, not changes in engagement.
+TOLERANCE = 1e-9
+
+
+def score(pub_date, comments, followers):
+    engagement = (comments * settings.POPULAR_COMMENT_WEIGHT
+                  + followers * settings.POPULAR_FOLLOWER_WEIGHT)
+    age = (pub_date - EPOCH).total_seconds() / settings.POPULAR_HALF_LIFE
+    return math.log2(1 + engagement) + age
+
+
+def score_new(post):
+    followers = Profile.objects.filter(user_id=post.author_id).values_list(
+        "following_count", flat=True
+    ).first()
+    post.score = score(post.pub_date, post.comments_count, followers or 0)
+    Post.objects.filter(id=post.id).update(score=post.score)
+
+
+def rescore(window=None):
+    """Update the scores that changed, return how many did.
+
+    With `window` None the last POPULAR_WINDOW seconds are rescored; pass
+    0 to rescore every post.
+    """
+    if window is None:
+        window = settings.POPULAR_WINDOW
+    posts = Post.objects.all()
+    if window:
+        posts = posts.filter(
+            pub_date__gte=timezone.now() - timedelta(seconds=window)
+        )
+    rows = posts.values_list(
+        "id", "pub_date", "comments_count",
+        Coalesce("author__profile__following_count", 0), "score",
+    ).order_by()
+    changed = []
+    with transaction.atomic():
+        for post_id, pub_date, comments, followers, old in rows.iterator():
+            new = score(pub_date, comments, followers)
+            if abs(new - old) > TOLERANCE:
+                changed.append((new, post_id))
+        counters.update_rows(Post, ["score"], changed)
+    if changed:
+        caching.bump("popular")
+    return len(changed)
@@ -0,0 +1,131 @@
+"""Inverted index over Post.text.
+
+Words are reduced to stems (Porter's algorithm for Russian, plain lower
+case otherwise), so "котики" finds "котик" and "котиков". SearchToken
+rows are kept up to date by posts.signals on every save of a post.
+"""
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import Post, SearchToken
+
+WORD = re.compile(r"\w+")
+MAX_TERM_LENGTH = SearchToken._meta.get_field("term").max_length
+
+STOP_WORDS = frozenset("""
+    а без более бы был была были было быть в вам вас весь во вот все всего
+    всех вы где да даже для до его ее если есть еще же за здесь и из или им
+    их к как ко когда кто ли либо мне может мы на надо наш не него нее нет
+    ни них но ну о об однако он она они оно от очень по под при про с со так
+    также такой там те тем то того тоже той только том ты у уже хотя чего
+    чей чем что чтобы чье чья эта эти это я
+    a an and are as at be by for from in is it of on or that the this to
+""".split())
+
+VOWELS = "аеиоуыэюя"
+RV = re.compile(f"^(.*?[{VOWELS}])(.*)$")
+PERFECTIVE_GERUND = re.compile(
+    r"((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$"
+)
+REFLEXIVE = re.compile(r"(с[яь])$")
+ADJECTIVE = re.compile(
+    r"(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|"
+    r"ую|юю|ая|яя|ою|ею)$"
+)
+PARTICIPLE = re.compile(r"((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$")
+VERB = re.compile(
+    r"((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено|"
+    r"ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|((?<=[ая])(ла|на|ете|йте|ли|й|"
+    r"л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$"
+)
+NOUN = re.compile(
+    r"(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|"
+    r"ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$"
+)
+DERIVATIONAL = re.compile(f".*[^{VOWELS}]+[{VOWELS}].*ость?$")
+SUPERLATIVE = re.compile(r"(ейше|ейш)$")
+
+
+def stem_russian(word):
+    match = RV.match(word)
+    if not match:
+        return word
+    prefix, rv = match.groups()
+    stripped = PERFECTIVE_GERUND.sub("", rv, 1)
+    if stripped == rv:
+        rv = REFLEXIVE.sub("", rv, 1)
+        stripped = ADJECTIVE.sub("", rv, 1)
+        if stripped != rv:
+            rv = PARTICIPLE.sub("", stripped, 1)
+        else:
+            stripped = VERB.sub("", rv, 1)
+            rv = NOUN.sub("", rv, 1) if stripped == rv else stripped
+    else:
+        rv = stripped
+    rv = re.sub("и$", "", rv)
+    if DERIVATIONAL.match(rv):
+        rv = re.sub("ость?$", "", rv)
+    stripped = re.sub("ь$", "", rv)
+    if stripped == rv:
+        rv = re.sub("нн$", "н", SUPERLATIVE.sub("", rv, 1))
+    else:
+        rv = stripped
+    return prefix + rv
+
+
+def stem(word):
+    word = word.lower().replace("ё", "е")
+    if re.search("[а-я]", word):
+        word = stem_russian(word)
+    return word[:MAX_TERM_LENGTH]
+
+
+def terms(text):
+    return Counter(
+        stem(word) for word in WORD.findall(text)
+        if len(word) > 1 and word.lower() not in STOP_WORDS
+    )
+
+
+def index_post(post, created=False):
+    if not created:
+        SearchToken.objects.filter(post=post).delete()
+    SearchToken.objects.bulk_create(
+        SearchToken(term=term, post=post, weight=weight)
+        for term, weight in terms(post.text).items()
+    )
+
+
+def rebuild(batch_size=1000):
+    with transaction.atomic():
+        SearchToken.objects.all().delete()
+        tokens = []
+        for post in Post.objects.only("id", "text").iterator():
+            tokens.extend(
+                SearchToken(term=term, post_id=post.id, weight=weight)
+                for term, weight in terms(post.text).items()
+            )
+            if len(tokens) >= batch_size:
+                SearchToken.objects.bulk_create(tokens)
+                tokens = []
+        SearchToken.objects.bulk_create(tokens)
+
+
+def search(query, queryset=None):
+    """Posts matching any word of `query`, best matches first.
+
+    Posts containing more distinct query words rank higher, then posts
+    where they occur more often, then newer posts. The ordering ends with
+    the id, so it is also the key of `?cursor=` pages of the results.
+    """
+    queryset = Post.objects.all() if queryset is None else queryset
+    query_terms = list(terms(query))
+    if not query_terms:
+        return queryset.none()
+    return queryset.filter(search_tokens__term__in=query_terms).annotate(
+        matched=Count("search_tokens"),
+        relevance=Sum("search_tokens__weight"),
+    ).order_by("-matched", "-relevance", "-pub_date", "-id")
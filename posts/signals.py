@@ -0,0 +1,106 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (caching, counters, lookups, ranking, search, timeline,
+               usernames)
+from .models import Comment, Follow, Group, Post, Profile, User
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def add_username(sender, instance, **kwargs):
+    usernames.add_user(instance.username)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    lookups.forget_user(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_group(sender, instance, **kwargs):
+    lookups.forget_group(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, raw=False, **kwargs):
+    # An edit that moves the post must refresh the old group's page too.
+    instance._old_group_slugs = []
+    if instance.pk and not raw:
+        instance._old_group_slugs = list(Post.objects.filter(
+            pk=instance.pk
+        ).values_list("group__slug", flat=True))
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    lookups.forget_post(instance.id)
+    if created:
+        counters.bump_profile(instance.author_id, posts_count=1)
+        timeline.fan_out(instance)
+        ranking.score_new(instance)
+    else:
+        caching.bump(caching.post_card(instance.id))
+    search.index_post(instance, created)
+    caching.bump(*caching.post_scopes(instance, instance._old_group_slugs))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    lookups.forget_post(instance.id)
+    counters.bump_profile(instance.author_id, posts_count=-1)
+    caching.bump(*caching.post_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_comments(instance.post_id, 1)
+        # The cached post carries comments_count.
+        lookups.forget_post(instance.post_id)
+        caching.bump(caching.post_card(instance.post_id),
+                     *caching.post_scopes(instance.post))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+    lookups.forget_post(instance.post_id)
+    caching.bump(caching.post_card(instance.post_id))
+    # Gone already when the comment is deleted along with its post.
+    post = Post.objects.select_related("author", "group").filter(
+        id=instance.post_id
+    ).first()
+    if post is not None:
+        caching.bump(*caching.post_scopes(post))
+
+
+def follow_scopes(follow):
+    return (f"author:{follow.user.username}",
+            f"author:{follow.author.username}")
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_profile(instance.user_id, followers_count=1)
+        counters.bump_profile(instance.author_id, following_count=1)
+        timeline.backfill(instance)
+        caching.bump(*follow_scopes(instance))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump_profile(instance.user_id, followers_count=-1)
+    counters.bump_profile(instance.author_id, following_count=-1)
+    timeline.prune(instance)
+    caching.bump(*follow_scopes(instance))
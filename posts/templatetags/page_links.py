@@ -0,0 +1,39 @@
+from django import template
+
+from posts.pagination import cursor_after, ordering_of
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page, around=2, ends=1):
+    """Page numbers to link to around `page`, with None for the gaps.
+
+    The first and last `ends` pages and `around` pages on either side of
+    the current one, so a feed of 50000 pages still renders a dozen links.
+    """
+    last = page.paginator.num_pages
+    shown = (set(range(1, ends + 1))
+             | set(range(last - ends + 1, last + 1))
+             | set(range(page.number - around, page.number + around + 1)))
+    window, previous = [], 0
+    for number in sorted(shown):
+        if not 1 <= number <= last:
+            continue
+        if number > previous + 1:
+            window.append(None)
+        window.append(number)
+        previous = number
+    return window
+
+
+@register.simple_tag
+def next_cursor(page):
+    """Cursor of the feed items after `page`, numbered or not."""
+    if getattr(page, "is_cursor", False):
+        return page.next_cursor
+    if not page.has_next():
+        return None
+    return cursor_after(
+        page[len(page) - 1], ordering_of(page.paginator.object_list)
+    )
@@ -0,0 +1,17 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post, size):
+    """The named thumbnail of a post's image, or None if not ready yet."""
+    if not post.image:
+        return None
+    thumbnail = thumbnails.cached_thumbnail(post.image, size)
+    if thumbnail is None:
+        # Uploaded before the pipeline existed, or its job was lost.
+        thumbnails.enqueue(post)
+    return thumbnail
@@ -0,0 +1,99 @@
+import gzip
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="gelya")
+        self.reader = User.objects.create(username="bardem")
+        self.group = Group.objects.create(
+            title="Котики", slug="cats", description="Про котиков"
+        )
+        self.posts = [
+            Post.objects.create(
+                text=f"Пост {i}", author=self.author,
+                group=self.group if i % 2 else None,
+            )
+            for i in range(5)
+        ]
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client = Client()
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(f"api:{name}", args=args), params)
+
+    def test_posts_follow_the_cursor(self):
+        ids, url = [], reverse("api:posts") + "?limit=2"
+        while url:
+            data = self.client.get(url).json()
+            ids += [post["id"] for post in data["results"]]
+            url = data["next"]
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+        data = self.get("posts", group="cats", fields="id,group").json()
+        self.assertEqual(data["results"], [
+            {"id": self.posts[3].id, "group": "cats"},
+            {"id": self.posts[1].id, "group": "cats"},
+        ])
+
+    def test_lists_run_a_constant_number_of_queries(self):
+        for post in self.posts:
+            Comment.objects.create(post=post, author=self.reader, text="!")
+        for name, args in (("posts", ()), ("follows", ()), ("groups", ()),
+                           ("comments", (self.posts[0].id,))):
+            for limit in (1, 50):
+                with self.subTest(name=name, limit=limit):
+                    queries = 2 if name == "comments" else 1
+                    with self.assertNumQueries(queries):
+                        self.get(name, *args, limit=limit)
+
+    def test_details_and_errors(self):
+        post = self.posts[1]
+        Comment.objects.create(post=post, author=self.reader, text="Мяу")
+        self.assertEqual(self.get("post", post.id).json(), {
+            "id": post.id, "text": "Пост 1", "author": "gelya",
+            "pub_date": DjangoJSONEncoder().default(post.pub_date),
+            "group": "cats", "image": None, "comments_count": 1,
+        })
+        comment = self.get("comments", post.id).json()["results"][0]
+        self.assertEqual((comment["author"], comment["text"]),
+                         ("bardem", "Мяу"))
+        self.assertEqual(self.get("group", "cats").json()["title"], "Котики")
+        follows = self.get("follows", author="gelya").json()["results"]
+        self.assertEqual(follows[0]["user"], "bardem")
+        for response in (self.get("post", 0), self.get("group", "dogs"),
+                         self.get("comments", 0)):
+            self.assertEqual(response.status_code, 404)
+        for params in ({"fields": "id,secret"}, {"limit": 0},
+                       {"limit": "many"}, {"cursor": "!"},
+                       {"ordering": "random"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get("posts", **params).status_code, 400)
+        response = self.client.post(reverse("api:posts"))
+        self.assertEqual(response.status_code, 405)
+
+    def test_conditional_and_gzipped_responses(self):
+        response = self.get("posts")
+        etag = response["ETag"]
+        response = self.client.get(
+            reverse("api:posts"), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text="Новый пост", author=self.author)
+        response = self.client.get(
+            reverse("api:posts"), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            reverse("api:posts"), HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(data["results"][0]["text"], "Новый пост")
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from yatube.cache import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, "cache.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {"OPTIONS": options})
+
+    def test_entries_are_shared_between_instances(self):
+        first, second = self.make_cache(), self.make_cache()
+        first.set("key", {"value": 1})
+        self.assertEqual(second.get("key"), {"value": 1})
+        second.delete("key")
+        self.assertIsNone(first.get("key"))
+
+    def test_incr_add_and_expiry(self):
+        cache = self.make_cache()
+        cache.set("counter", 1)
+        self.assertEqual(cache.incr("counter", 5), 6)
+        self.assertFalse(cache.add("counter", 0))
+        with self.assertRaises(ValueError):
+            cache.incr("missing")
+        cache.set("short", 1, timeout=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("short"))
+        self.assertTrue(cache.add("short", 2))
+
+    def test_least_recently_used_entries_are_culled(self):
+        cache = self.make_cache(
+            MAX_ENTRIES=10, CULL_FREQUENCY=10, CULL_EVERY=1
+        )
+        for i in range(10):
+            cache.set(f"key{i}", i)
+        time.sleep(1.1)
+        cache.get("key0")
+        cache.set("key10", 10)
+        self.assertEqual(cache.get("key0"), 0)
+        self.assertIsNone(cache.get("key1"))
+        self.assertEqual(cache.get("key10"), 10)
+
+    def test_size_limit_is_enforced(self):
+        cache = self.make_cache(MAX_SIZE=2000, CULL_EVERY=1)
+        for i in range(10):
+            cache.set(f"key{i}", "x" * 500)
+        self.assertLessEqual(
+            len(cache.get_many([f"key{i}" for i in range(10)])), 4
+        )
+        self.assertIsNotNone(cache.get("key9"))
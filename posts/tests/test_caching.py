@@ -0,0 +1,180 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts import caching
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class PostCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="gelya")
+        self.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание"
+        )
+        self.post = Post.objects.create(
+            text="Старый текст", author=self.user, group=self.group
+        )
+        # The post page itself is not page-cached, only its card is.
+        self.url = reverse(
+            "post", kwargs={"username": "gelya", "post_id": self.post.id}
+        )
+        self.client = Client()
+
+    def test_card_is_served_from_cache(self):
+        self.client.get(self.url)
+        Post.objects.filter(id=self.post.id).update(text="Новый текст")
+        self.assertContains(self.client.get(self.url), "Старый текст")
+
+    def test_save_invalidates_card(self):
+        self.client.get(self.url)
+        self.post.text = "Новый текст"
+        self.post.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "Новый текст")
+        self.assertNotContains(response, "Старый текст")
+
+    def test_comment_invalidates_card(self):
+        self.client.get(self.url)
+        Comment.objects.create(post=self.post, author=self.user, text="1")
+        self.assertContains(self.client.get(self.url), "Комментариев: 1")
+
+    def test_edit_link_is_not_shared_between_viewers(self):
+        self.client.get(self.url)
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(self.url), "Редактировать")
+        self.client.logout()
+        self.assertNotContains(self.client.get(self.url), "Редактировать")
+
+
+class VersionedPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="gelya")
+        self.reader = User.objects.create(username="bardem")
+        self.group = Group.objects.create(
+            title="Тестовая группа", slug="test-slug", description="1"
+        )
+        self.other_group = Group.objects.create(
+            title="Новая группа", slug="new-slug", description="2"
+        )
+        self.post = Post.objects.create(
+            text="Старый текст", author=self.user, group=self.group
+        )
+        self.client = Client()
+
+    def test_pages_are_served_from_cache_until_a_write(self):
+        urls = [
+            reverse("index"),
+            reverse("group", kwargs={"slug": "test-slug"}),
+            reverse("profile", kwargs={"username": "gelya"}),
+        ]
+        for url in urls:
+            self.client.get(url)
+        Post.objects.filter(id=self.post.id).update(text="Новый текст")
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), "Старый текст")
+        Post.objects.create(text="Ещё текст", author=self.user,
+                            group=self.group)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), "Ещё текст")
+
+    def test_moving_post_refreshes_both_groups(self):
+        old_url = reverse("group", kwargs={"slug": "test-slug"})
+        new_url = reverse("group", kwargs={"slug": "new-slug"})
+        self.client.get(old_url)
+        self.client.get(new_url)
+        self.post.group = self.other_group
+        self.post.save()
+        self.assertNotContains(self.client.get(old_url), "Старый текст")
+        self.assertContains(self.client.get(new_url), "Старый текст")
+
+    def test_follow_refreshes_profile(self):
+        url = reverse("profile", kwargs={"username": "gelya"})
+        self.assertContains(self.client.get(url), "Подписчиков: 0")
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.assertContains(self.client.get(url), "Подписчиков: 1")
+
+    def test_comment_refreshes_feed(self):
+        url = reverse("index")
+        self.client.get(url)
+        Comment.objects.create(post=self.post, author=self.reader, text="1")
+        self.assertContains(self.client.get(url), "Комментариев: 1")
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="gelya")
+        self.post = Post.objects.create(text="Текст", author=self.user)
+        self.urls = [
+            reverse("index"),
+            reverse("profile", kwargs={"username": "gelya"}),
+            reverse("post", kwargs={"username": "gelya",
+                                    "post_id": self.post.id}),
+        ]
+        self.client = Client()
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_are_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)["ETag"]
+                with self.assertNumQueries(0):
+                    response = self.revalidate(url, etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        etags = {url: self.client.get(url)["ETag"] for url in self.urls}
+        Comment.objects.create(post=self.post, author=self.user, text="1")
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.revalidate(url, etag)
+                self.assertContains(response, "Комментариев: 1")
+
+    def test_etag_depends_on_the_viewer(self):
+        url = self.urls[0]
+        response = self.client.get(url)
+        self.assertIn("public", response["Cache-Control"])
+        self.client.force_login(self.user)
+        response = self.revalidate(url, response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_logging_in_again_changes_the_etag(self):
+        User.objects.create_user(username="bardem", password="Pa55-word")
+        credentials = {"username": "bardem", "password": "Pa55-word"}
+        url = self.urls[2]
+        self.client.post(reverse("login"), credentials)
+        etag = self.client.get(url)["ETag"]
+        self.client.get(reverse("logout"))
+        self.client.post(reverse("login"), credentials)
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        # The fresh form's token is accepted.
+        self.client.handler.enforce_csrf_checks = True
+        response = self.client.post(
+            reverse("add_comment", args=["gelya", self.post.id]),
+            {"text": "Комментарий",
+             "csrfmiddlewaretoken": response.context["csrf_token"]},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_replica_renders_have_no_etag(self):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        request.read_replica = "replica1"
+        response = HttpResponse()
+        caching.add_validators(request, response, '"etag"')
+        self.assertFalse(response.has_header("ETag"))
+        self.assertIn("no-cache", response["Cache-Control"])
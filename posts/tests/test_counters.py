@@ -0,0 +1,109 @@
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.counters import stats_for
+
+from posts.models import Comment, Follow, Post, Profile, User
+from yatube.routers import PrimaryReplicaRouter
+
+
+class CountersTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="gelya")
+        self.reader = User.objects.create(username="bardem")
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_views_maintain_counters(self):
+        post = Post.objects.create(text="Тестовый текст", author=self.author)
+        self.client.get(
+            reverse("profile_follow", kwargs={"username": "gelya"})
+        )
+        self.client.post(
+            reverse("add_comment",
+                    kwargs={"username": "gelya", "post_id": post.id}),
+            data={"text": "Комментарий"}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.profile(self.author).posts_count, 1)
+        self.assertEqual(self.profile(self.author).following_count, 1)
+        self.assertEqual(self.profile(self.reader).followers_count, 1)
+
+        self.client.get(
+            reverse("profile_unfollow", kwargs={"username": "gelya"})
+        )
+        Comment.objects.all().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.assertEqual(self.profile(self.author).following_count, 0)
+        self.assertEqual(self.profile(self.reader).followers_count, 0)
+
+    def test_rebuild_counters_fixes_drift(self):
+        Post.objects.bulk_create(
+            [Post(text=str(i), author=self.author) for i in range(3)]
+        )
+        Follow.objects.bulk_create([Follow(user=self.reader,
+                                           author=self.author)])
+        Profile.objects.filter(user=self.reader).delete()
+        call_command("rebuild_counters", stdout=StringIO())
+        self.assertEqual(self.profile(self.author).posts_count, 3)
+        self.assertEqual(self.profile(self.author).following_count, 1)
+        self.assertEqual(self.profile(self.reader).followers_count, 1)
+
+    def test_post_page_does_not_count_rows(self):
+        post = Post.objects.create(text="Тестовый текст", author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text="1")
+        url = reverse("post", kwargs={"username": "gelya",
+                                      "post_id": post.id})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse(
+            [q for q in queries if "COUNT(" in q["sql"].upper()]
+        )
+        self.assertEqual(response.context.get("post_count"), 1)
+        self.assertContains(response, "Комментариев: 1")
+
+    def test_missing_profile_is_read_back_from_default(self):
+        Post.objects.create(text="Тестовый текст", author=self.author)
+        Profile.objects.filter(user=self.author).delete()
+
+        routed = []
+
+        def db_for_read(model, **hints):
+            # The first profile read misses the row on default, as it would
+            # on a replica; any read of the profile created after it must
+            # not be routed at all, as no replica has the row yet.
+            if model is not Profile:
+                return "default"
+            routed.append(model)
+            return "default" if len(routed) == 1 else "replica1"
+
+        with mock.patch.object(PrimaryReplicaRouter, "db_for_read",
+                               side_effect=db_for_read):
+            profile = stats_for(User.objects.get(id=self.author.id))
+        self.assertEqual(profile.posts_count, 1)
+
+    def test_migration_creates_missing_profiles(self):
+        migration = import_module(
+            "posts.migrations.0008_create_missing_profiles"
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        Profile.objects.all().delete()
+        migration.create_missing_profiles(apps, None)
+        self.assertEqual(self.profile(self.author).following_count, 1)
+        self.assertEqual(self.profile(self.reader).followers_count, 1)
+        self.assertFalse(self.profile(self.author).celebrity)
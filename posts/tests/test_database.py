@@ -0,0 +1,169 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection, connections
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import resolve
+
+from posts import caching
+from posts.models import Post
+from yatube import replication
+from yatube.backends.sqlite3.base import DatabaseWrapper
+from yatube.routers import (STICKY_COOKIE, PrimaryReplicaRouter,
+                            ReplicaRoutingMiddleware)
+
+
+class SQLiteBackendTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def wrapper(self, alias="test", **options):
+        wrapper = DatabaseWrapper({
+            **settings.DATABASES["default"],
+            "NAME": os.path.join(self.directory, "db.sqlite3"),
+            "OPTIONS": {**settings.SQLITE_OPTIONS, **options},
+        }, alias)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        wrapper = self.wrapper()
+        self.assertEqual(self.pragma(wrapper, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(wrapper, "synchronous"), 1)
+        self.assertEqual(self.pragma(wrapper, "cache_size"), -64 * 1024)
+        self.assertEqual(self.pragma(wrapper, "foreign_keys"), 1)
+        # The test database gets them too.
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA temp_store")
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_immediate_transactions_take_the_write_lock(self):
+        writer = self.wrapper()
+        with writer.cursor() as cursor:
+            cursor.execute("CREATE TABLE t (x)")
+        writer._start_transaction_under_autocommit()
+        other = self.wrapper("other", timeout=0.1)
+        with self.assertRaisesMessage(OperationalError, "locked"):
+            with other.cursor() as cursor:
+                cursor.execute("INSERT INTO t VALUES (1)")
+        # Readers are not blocked in WAL mode.
+        with other.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM t")
+        writer.connection.rollback()
+
+    def test_read_transactions_see_a_snapshot_without_the_lock(self):
+        reader = self.wrapper("reader")
+        # atomic() finds connections by alias.
+        setattr(connections._connections, "reader", reader)
+        self.addCleanup(delattr, connections._connections, "reader")
+        with reader.cursor() as cursor:
+            cursor.execute("CREATE TABLE t (x)")
+        other = self.wrapper("other", timeout=0.1)
+        with reader.read_transaction():
+            with reader.cursor() as cursor:
+                cursor.execute("SELECT count(*) FROM t")
+                with other.cursor() as writer:
+                    writer.execute("INSERT INTO t VALUES (1)")
+                cursor.execute("SELECT count(*) FROM t")
+                self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertEqual(reader.transaction_mode, "IMMEDIATE")
+
+    def test_unknown_transaction_mode(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.wrapper(transaction_mode="LAZY").get_connection_params()
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    router = PrimaryReplicaRouter()
+
+    def request(self, path, method="get", cookies=None):
+        """Run a request through the middleware, return where it read."""
+        factory = RequestFactory()
+        for name, value in (cookies or {}).items():
+            factory.cookies[name] = value
+        request = getattr(factory, method)(path)
+        request.resolver_match = resolve(path)
+        reads = {}
+
+        def view(request):
+            reads["post"] = self.router.db_for_read(Post)
+            reads["session"] = self.router.db_for_read(Session)
+            if method == "post":
+                self.router.db_for_write(Post)
+            return HttpResponse()
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        return reads, middleware(request)
+
+    def test_without_replicas_everything_uses_default(self):
+        reads, _ = self.request("/")
+        self.assertEqual(reads, {"post": "default", "session": "default"})
+
+    @override_settings(DATABASE_REPLICAS=["replica1"])
+    def test_feed_reads_go_to_a_replica(self):
+        reads, response = self.request("/")
+        self.assertEqual(reads, {"post": "replica1", "session": "default"})
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+        # Outside of requests.
+        self.assertEqual(self.router.db_for_read(Post), "default")
+        self.assertEqual(self.router.db_for_write(Post), "default")
+        self.assertTrue(self.router.allow_migrate("default", "posts"))
+        self.assertFalse(self.router.allow_migrate("replica1", "posts"))
+
+    @override_settings(DATABASE_REPLICAS=["replica1"])
+    def test_other_views_read_from_default(self):
+        reads, _ = self.request("/search/")
+        self.assertEqual(reads["post"], "default")
+
+    @override_settings(DATABASE_REPLICAS=["replica1"], DATABASE_REPLICA_LAG=7)
+    def test_writer_sticks_to_default(self):
+        reads, response = self.request("/", method="post")
+        self.assertEqual(reads["post"], "default")
+        cookie = response.cookies[STICKY_COOKIE]
+        self.assertEqual(cookie["max-age"], 7)
+        reads, _ = self.request("/", cookies={STICKY_COOKIE: "1"})
+        self.assertEqual(reads["post"], "default")
+
+    @override_settings(DATABASE_REPLICAS=["replica1"], DATABASE_REPLICA_LAG=7)
+    def test_replica_reads_are_cached_briefly(self):
+        self.assertEqual(caching.replica_timeout(3600, "replica1"), 7)
+        self.assertEqual(caching.replica_timeout(3600, "default"), 3600)
+
+
+class ReplicationTests(SimpleTestCase):
+    def test_copy_updates_open_connections(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        primary = os.path.join(directory, "primary.sqlite3")
+        replica = os.path.join(directory, "replica.sqlite3")
+        writer = sqlite3.connect(primary, isolation_level=None)
+        self.addCleanup(writer.close)
+        writer.execute("PRAGMA journal_mode = wal")
+        writer.execute("CREATE TABLE t (x)")
+        replication.copy(primary, replica)
+        reader = sqlite3.connect(replica, isolation_level=None)
+        self.addCleanup(reader.close)
+        reader.execute("PRAGMA query_only = on")
+        writer.execute("INSERT INTO t VALUES (1)")
+        self.assertEqual(reader.execute("SELECT count(*) FROM t").fetchone(),
+                         (0,))
+        replication.copy(primary, replica)
+        self.assertEqual(reader.execute("SELECT count(*) FROM t").fetchone(),
+                         (1,))
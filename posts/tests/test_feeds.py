@@ -0,0 +1,119 @@
+import re
+from html import unescape
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+MORE = re.compile(r'data-fragment="([^"]+)"')
+
+
+class FeedQueriesMixin:
+    """Assert that rendering a feed page costs a bounded number of queries.
+
+    The page is rendered twice, before and after `grow()` adds more posts,
+    so an N+1 in post_item.html shows up as a difference in query counts.
+    """
+
+    def render_queries(self, client, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertFeedQueries(self, client, url, grow, max_queries):
+        before = self.render_queries(client, url)
+        grow()
+        after = self.render_queries(client, url)
+        self.assertEqual(
+            before, after, f"{url} runs more queries with more posts"
+        )
+        self.assertLessEqual(after, max_queries)
+
+
+class FeedQueriesTests(FeedQueriesMixin, TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username="gelya")
+        self.reader = User.objects.create(username="bardem")
+        self.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание"
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.add_posts(1)
+
+    def add_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                text=f"Тестовый текст {i}",
+                author=self.author,
+                group=self.group
+            )
+            Comment.objects.create(post=post, author=self.reader, text="1")
+
+    def test_feed_pages_have_constant_query_count(self):
+        urls = {
+            reverse("index"): 4,
+            reverse("group", kwargs={"slug": "test-slug"}): 5,
+            reverse("profile", kwargs={"username": "gelya"}): 7,
+            # One of them reads the follow suggestions.
+            reverse("follow_index"): 6,
+        }
+        for url, max_queries in urls.items():
+            with self.subTest(url=url):
+                self.assertFeedQueries(
+                    self.client, url, lambda: self.add_posts(4), max_queries
+                )
+
+
+class FeedFragmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="gelya")
+        self.reader = User.objects.create(username="bardem")
+        self.group = Group.objects.create(
+            title="Тестовая группа", slug="test-slug", description="1"
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        for i in range(12):
+            Post.objects.create(
+                text=f"Пост номер {i:02}", author=self.author,
+                group=self.group
+            )
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_load_more_continues_every_feed(self):
+        pages = {
+            reverse("index"): reverse("index_more"),
+            reverse("group", args=["test-slug"]): reverse(
+                "group_more", args=["test-slug"]
+            ),
+            reverse("profile", args=["gelya"]): reverse(
+                "profile_more", args=["gelya"]
+            ),
+            reverse("follow_index"): reverse("follow_more"),
+        }
+        for url, fragment_url in pages.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                texts = [post.text for post in response.context["page"]]
+                while True:
+                    more = MORE.search(response.content.decode())
+                    if more is None:
+                        break
+                    self.assertTrue(more.group(1).startswith(fragment_url))
+                    response = self.client.get(unescape(more.group(1)))
+                    self.assertTemplateNotUsed(response, "base.html")
+                    texts += [post.text for post in response.context["page"]]
+                self.assertEqual(
+                    texts, [f"Пост номер {i:02}" for i in range(11, -1, -1)]
+                )
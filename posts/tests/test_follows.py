@@ -0,0 +1,151 @@
+import json
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import follows
+from posts.counters import stats_for
+from posts.models import (Follow, FollowSuggestion, Post, TimelineEntry,
+                          User)
+
+
+class FollowBatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create(username="reader")
+        self.authors = [
+            User.objects.create(username=f"author{i}") for i in range(3)
+        ]
+        for author in self.authors:
+            Post.objects.create(text=f"Пост {author.username}", author=author)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def stats(self, user):
+        return stats_for(User.objects.get(id=user.id))
+
+    def post_json(self, data):
+        return self.client.post(
+            reverse("follow_batch"), json.dumps(data),
+            content_type="application/json",
+        )
+
+    def test_follow_many_keeps_derived_data(self):
+        self.stats(self.authors[0])
+        with self.assertNumQueries(1):
+            follows.resolve(self.reader, ["author0", "author1", "nobody"])
+        response = self.post_json(
+            {"follow": ["author0", "author1", "nobody", "reader"]}
+        )
+        self.assertEqual(response.json(), {
+            "followed": ["author0", "author1"], "unfollowed": [],
+        })
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 2)
+        self.assertEqual(self.stats(self.reader).followers_count, 2)
+        self.assertEqual(self.stats(self.authors[0]).following_count, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+        # Following again changes nothing.
+        response = self.post_json({"follow": ["author0"]})
+        self.assertEqual(response.json()["followed"], [])
+        self.assertEqual(self.stats(self.reader).followers_count, 2)
+
+    def test_unfollow_many(self):
+        follows.follow_many(self.reader, ["author0", "author1", "author2"])
+        response = self.client.post(
+            reverse("follow_batch"), {"unfollow": ["author0", "author2"]}
+        )
+        self.assertRedirects(response, reverse("follow_index"))
+        self.assertEqual(
+            list(Follow.objects.filter(user=self.reader)
+                 .values_list("author__username", flat=True)),
+            ["author1"]
+        )
+        self.assertEqual(self.stats(self.reader).followers_count, 1)
+        self.assertEqual(self.stats(self.authors[0]).following_count, 0)
+        self.assertEqual(self.stats(self.authors[1]).following_count, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 1
+        )
+
+    def test_batches_take_the_same_queries_for_any_number_of_authors(self):
+        for i in range(3, 10):
+            author = User.objects.create(username=f"author{i}")
+            Post.objects.create(text=f"Пост {i}", author=author)
+        few = ["author0", "author1"]
+        many = [f"author{i}" for i in range(2, 10)]
+        counts = {}
+        for name, usernames in (("few", few), ("many", many)):
+            cache.clear()
+            with CaptureQueriesContext(connection) as followed:
+                follows.follow_many(self.reader, usernames)
+            with CaptureQueriesContext(connection) as unfollowed:
+                follows.unfollow_many(self.reader, usernames)
+            counts[name] = (len(followed), len(unfollowed))
+        self.assertEqual(counts["few"], counts["many"])
+        self.assertFalse(Follow.objects.filter(user=self.reader))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+
+    @override_settings(FOLLOW_BATCH_LIMIT=2)
+    def test_bad_requests(self):
+        response = self.post_json({"follow": ["a", "b", "c"]})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            reverse("follow_batch"), "[", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        for data in ({"follow": "author0"}, {"unfollow": [1]},
+                     {"follow": None}, ["author0"]):
+            with self.subTest(data=data):
+                self.assertEqual(self.post_json(data).status_code, 400)
+        self.assertFalse(Follow.objects.filter(user=self.reader))
+        response = self.client.get(reverse("follow_batch"))
+        self.assertEqual(response.status_code, 405)
+
+
+class FollowSuggestionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        users = {name: User.objects.create(username=name)
+                 for name in ("ann", "bob", "cat", "dan", "eve")}
+        for user, authors in {
+            "ann": ["bob", "cat"],
+            "bob": ["dan", "eve"],
+            "cat": ["dan", "ann"],
+        }.items():
+            follows.follow_many(users[user], authors)
+        self.ann = users["ann"]
+
+    def test_friends_of_friends_are_ranked(self):
+        call_command("compute_suggestions", stdout=StringIO())
+        self.assertEqual(
+            [(s.author.username, s.score)
+             for s in follows.suggestions(self.ann)],
+            [("dan", 2), ("eve", 1)]
+        )
+        # Authors followed after the computation drop out on read.
+        follows.follow_many(self.ann, ["dan"])
+        self.assertEqual(
+            [s.author.username for s in follows.suggestions(self.ann)],
+            ["eve"]
+        )
+        client = Client()
+        client.force_login(self.ann)
+        response = client.get(reverse("follow_index"))
+        self.assertContains(response, 'value="eve"')
+        response = client.get(reverse("follow_suggestions"))
+        self.assertEqual(response.json(),
+                         {"suggestions": [{"username": "eve", "score": 1}]})
+
+    def test_limit(self):
+        # cat is suggested bob through ann; nobody cat follows follows cat.
+        self.assertEqual(follows.compute_suggestions(limit=1), 2)
+        self.assertEqual(FollowSuggestion.objects.filter(
+            user=self.ann
+        ).get().author.username, "dan")
@@ -0,0 +1,65 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import graph
+from posts.models import Follow, Profile, User
+
+
+class GraphTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.users = {name: User.objects.create(username=name)
+                      for name in ("ann", "bob", "cat", "dan", "eve")}
+        # ann <-> bob, cat -> bob, dan -> cat, eve follows nobody.
+        for user, author in (("ann", "bob"), ("bob", "ann"),
+                             ("cat", "bob"), ("dan", "cat")):
+            Follow.objects.create(
+                user=self.users[user], author=self.users[author]
+            )
+
+    def test_export_builds_csr_of_followers(self):
+        data = graph.export(self.directory)
+        names = {user.id: name for name, user in self.users.items()}
+        followers = {
+            names[data.ids[i]]: sorted(
+                names[data.ids[j]]
+                for j in data.indices[data.indptr[i]:data.indptr[i + 1]]
+            )
+            for i in range(data.size)
+        }
+        self.assertEqual(followers, {
+            "ann": ["bob"], "bob": ["ann", "cat"], "cat": ["dan"],
+            "dan": [], "eve": [],
+        })
+        loaded = graph.load(self.directory)
+        self.assertEqual(loaded.indices.tolist(), data.indices.tolist())
+
+    def test_metrics_are_stored_on_profiles(self):
+        with override_settings(GRAPH_ROOT=self.directory):
+            call_command("analyze_graph", stdout=StringIO())
+        profiles = {profile.user.username: profile
+                    for profile in Profile.objects.select_related("user")}
+        self.assertEqual(
+            {name: p.mutual_count for name, p in profiles.items()},
+            {"ann": 1, "bob": 1, "cat": 0, "dan": 0, "eve": 0}
+        )
+        # bob: ann and cat, then dan through cat (bob himself excluded).
+        self.assertEqual(
+            {name: p.reach for name, p in profiles.items()},
+            {"ann": 2, "bob": 3, "cat": 1, "dan": 0, "eve": 0}
+        )
+        ranking = sorted(profiles, key=lambda name: -profiles[name].pagerank)
+        self.assertEqual(ranking[0], "bob")
+        self.assertAlmostEqual(
+            sum(p.pagerank for p in profiles.values()), 1, places=5
+        )
+
+    def test_reach_does_not_depend_on_block_size(self):
+        data = graph.export(self.directory)
+        self.assertEqual(graph.reach(data, budget=1).tolist(),
+                         graph.reach(data).tolist())
@@ -0,0 +1,51 @@
+import io
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from posts import images
+from posts.forms import PostForm
+
+
+def upload(size, image_format="JPEG", mode="RGB", name="photo.jpg",
+           **options):
+    content = io.BytesIO()
+    Image.new(mode, size, "red").save(content, image_format, **options)
+    return SimpleUploadedFile(name, content.getvalue())
+
+
+@override_settings(POST_IMAGE_MAX_SIDE=200, POST_IMAGE_MAX_PIXELS=150_000)
+class ImageNormalizationTests(SimpleTestCase):
+    def test_large_jpeg_is_downscaled_and_stripped(self):
+        exif = Image.Exif()
+        exif[0x010F] = "Camera"
+        result = images.normalize(upload((1600, 1200), exif=exif.tobytes()))
+        image = Image.open(result)
+        self.assertEqual(image.format, "JPEG")
+        self.assertEqual(image.size, (200, 150))
+        self.assertNotIn("exif", image.info)
+
+    def test_draft_decodes_jpeg_at_reduced_scale(self):
+        # 1600x1200 = 1.9M pixels, over the limit unless decoded at 1/4.
+        images.normalize(upload((1600, 1200)))
+
+    def test_too_many_pixels_are_rejected_before_decoding(self):
+        with self.assertRaises(ValidationError):
+            images.normalize(upload((1600, 1200), "PNG", name="big.png"))
+
+    def test_transparent_image_stays_png(self):
+        result = images.normalize(
+            upload((100, 100), "PNG", "RGBA", name="logo.png")
+        )
+        self.assertEqual(result.name, "logo.png")
+        self.assertEqual(Image.open(result).mode, "RGBA")
+
+    @override_settings(POST_IMAGE_MAX_BYTES=10)
+    def test_oversized_upload_is_rejected_by_form(self):
+        form = PostForm(
+            data={"text": "Текст"}, files={"image": upload((10, 10))}
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("image", form.errors)
@@ -0,0 +1,48 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import loadgen
+from posts.models import (Comment, Follow, Post, Profile, SearchToken,
+                          TimelineEntry, User)
+
+
+class LoadgenTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generate_skewed_data(self):
+        totals = loadgen.generate(
+            users=50, groups=3, posts=500, comments=300, follows=5, images=0
+        )
+        self.assertEqual(totals["User"], 50)
+        self.assertEqual(totals["Post"], 500)
+        self.assertEqual(totals["Comment"], 300)
+        self.assertEqual(totals["Follow"], Follow.objects.count())
+        posts_per_author = sorted(
+            (author.posts.count() for author in User.objects.all()),
+            reverse=True
+        )
+        self.assertGreater(posts_per_author[0], 5 * posts_per_author[25])
+        oldest = Post.objects.order_by("pub_date").first().pub_date
+        self.assertLess(oldest, timezone.now() - timedelta(days=30))
+
+    def test_command_rebuilds_derived_data(self):
+        call_command(
+            "generate_data", users=20, groups=2, posts=100, comments=50,
+            follows=3, images=0, stdout=StringIO()
+        )
+        self.assertEqual(
+            Profile.objects.aggregate(n=Sum("posts_count"))["n"], 100
+        )
+        self.assertEqual(
+            Post.objects.aggregate(n=Sum("comments_count"))["n"],
+            Comment.objects.count()
+        )
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertTrue(SearchToken.objects.exists())
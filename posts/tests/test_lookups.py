@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase
+
+from posts import lookups
+from posts.models import Comment, Group, Post, User
+
+
+class LookupCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="gelya", first_name="Ангелина")
+        self.group = Group.objects.create(
+            title="Тестовая группа", slug="test-slug", description="1"
+        )
+        self.post = Post.objects.create(
+            text="Текст", author=self.user, group=self.group
+        )
+
+    def test_lookups_are_served_from_cache(self):
+        lookups.get_user("gelya")
+        lookups.get_group("test-slug")
+        lookups.get_post("gelya", self.post.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(lookups.get_user("gelya").first_name,
+                             "Ангелина")
+            self.assertEqual(lookups.get_group("test-slug"), self.group)
+            post = lookups.get_post("gelya", self.post.id)
+            self.assertEqual(post.author.username, "gelya")
+            self.assertEqual(post.group.slug, "test-slug")
+
+    def test_writes_invalidate(self):
+        lookups.get_user("gelya")
+        lookups.get_group("test-slug")
+        lookups.get_post("gelya", self.post.id)
+        self.user.first_name = "Геля"
+        self.user.save()
+        self.group.title = "Новое название"
+        self.group.save()
+        Comment.objects.create(post=self.post, author=self.user, text="1")
+        self.assertEqual(lookups.get_user("gelya").first_name, "Геля")
+        self.assertEqual(lookups.get_group("test-slug").title,
+                         "Новое название")
+        post = lookups.get_post("gelya", self.post.id)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.group.title, "Новое название")
+        self.post.delete()
+        with self.assertRaises(Http404):
+            lookups.get_post("gelya", self.post.id)
+
+    def test_missing_objects_raise_404(self):
+        User.objects.create(username="bardem")
+        for lookup in (lambda: lookups.get_user("nobody"),
+                       lambda: lookups.get_group("nothing"),
+                       lambda: lookups.get_post("gelya", 0),
+                       lambda: lookups.get_post("bardem", self.post.id)):
+            with self.assertRaises(Http404):
+                lookup()
+
+    def test_password_hash_is_not_cached(self):
+        lookups.get_user("gelya")
+        cached = cache.get(lookups.user_key("gelya"))
+        self.assertNotIn("password", cached.__dict__)
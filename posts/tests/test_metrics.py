@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube import metrics
+
+
+class HistogramTests(TestCase):
+    def test_quantiles_interpolate_within_buckets(self):
+        histogram = metrics.Histogram((1, 2, 4))
+        for value in (0.5, 1.5, 1.5, 3, 10):
+            histogram.observe(value)
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.sum, 16.5)
+        self.assertEqual(
+            list(histogram.cumulative()),
+            [(1, 1), (2, 3), (4, 4), (float("inf"), 5)]
+        )
+        self.assertEqual(histogram.quantile(0.5), 1.75)
+        self.assertEqual(histogram.quantile(1), 4)
+
+
+@override_settings(METRICS_SAMPLE_RATE=1, METRICS_TOKEN="secret")
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        author = User.objects.create(username="gelya")
+        Post.objects.create(text="Тестовый текст", author=author)
+        self.client = Client()
+
+    def row(self, view):
+        return next(row for row in metrics.summary() if row["view"] == view)
+
+    def test_request_is_measured_per_view(self):
+        self.client.get(reverse("index"))
+        self.client.get(reverse("index"))
+        row = self.row("index")
+        self.assertEqual(row["requests"], 2)
+        self.assertGreater(row["queries"], 0)
+        self.assertGreater(row["template_time"], 0)
+        # The second request is served from the page cache.
+        self.assertGreater(row["cache_hit_rate"], 0)
+        self.assertLess(row["cache_hit_rate"], 1)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_sampled_out_requests_are_not_recorded(self):
+        self.client.get(reverse("index"))
+        self.assertEqual(metrics.summary(), [])
+
+    def test_endpoints_are_for_staff_only(self):
+        self.client.get(reverse("index"))
+        for name in ("metrics", "metrics_prometheus"):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 302)
+        admin = User.objects.create(username="admin", is_staff=True)
+        self.client.force_login(admin)
+        response = self.client.get(reverse("metrics"))
+        self.assertContains(response, "<td>index</td>", html=True)
+
+    def test_prometheus_dump_with_token(self):
+        self.client.get(reverse("index"))
+        response = self.client.get(
+            reverse("metrics_prometheus"), HTTP_AUTHORIZATION="Bearer secre"
+        )
+        self.assertEqual(response.status_code, 302)
+        response = self.client.get(
+            reverse("metrics_prometheus"), HTTP_AUTHORIZATION="Bearer secret"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response,
+            'yatube_request_duration_seconds_bucket{view="index",le="+Inf"} 1'
+        )
+        self.assertContains(response, "# TYPE yatube_db_queries histogram")
+        self.assertContains(response, 'yatube_cache_misses_total{view="index"}')
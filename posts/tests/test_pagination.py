@@ -0,0 +1,142 @@
+import base64
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.pagination import (CursorPaginator, approximate_count,
+                              encode_cursor)
+from posts.templatetags.page_links import page_window
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username="gelya")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание"
+        )
+        Post.objects.bulk_create(
+            [Post(
+                text=f"Тестовый текст {i}",
+                author=cls.user,
+                group=cls.group
+            ) for i in range(0, 23)]
+        )
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_pages_walk_whole_feed_in_order(self):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        expected = list(Post.objects.order_by("-pub_date", "-id"))
+        page = paginator.page()
+        self.assertFalse(page.has_previous())
+        seen = list(page)
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            self.assertTrue(page.has_previous())
+            seen.extend(page)
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(page), 3)
+
+    def test_previous_cursor_returns_to_previous_page(self):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertEqual(back.next_cursor, first.next_cursor)
+
+    def test_deep_page_uses_single_query(self):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        cursor = paginator.page().next_cursor
+        with self.assertNumQueries(1):
+            list(paginator.page(cursor))
+
+    def test_feed_views_accept_cursor(self):
+        urls = [
+            reverse("index"),
+            reverse("group", kwargs={"slug": "test-slug"}),
+            reverse("profile", kwargs={"username": "gelya"}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url + "?cursor=")
+                page = response.context.get("page")
+                self.assertTrue(page.is_cursor)
+                self.assertTrue(page.has_next())
+                self.assertContains(response, "?cursor=" + page.next_cursor)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse("index") + "?cursor=garbage")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(response.context.get("page")),
+            list(Post.objects.order_by("-pub_date", "-id")[:10])
+        )
+
+    def test_tampered_cursor_falls_back_to_first_page(self):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first_page = list(paginator.page())
+        cursor = encode_cursor(["not a date", 1])
+        self.assertEqual(list(paginator.get_page(cursor)), first_page)
+        for key in ("Infinity", "NaN", "1e400"):
+            payload = f'[0, "2020-01-01T00:00:00+00:00", {key}]'
+            cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+            with self.subTest(key=key):
+                self.assertEqual(list(paginator.get_page(cursor)),
+                                 first_page)
+                response = self.client.get(reverse("index"),
+                                           {"cursor": cursor})
+                self.assertEqual(response.status_code, 200)
+
+    def test_out_of_range_cursor_falls_back_to_first_page(self):
+        last = Post.objects.order_by("pub_date").first()
+        cursor = encode_cursor([last.pub_date, 10 ** 30])
+        response = self.client.get(reverse("index"), {"cursor": cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["page"]), 10)
+        response = self.client.get(reverse("api:posts"), {"cursor": cursor})
+        self.assertEqual(response.status_code, 400)
+
+
+class NumberedPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="gelya")
+        Post.objects.bulk_create(
+            [Post(text=f"Тестовый текст {i}", author=self.user)
+             for i in range(0, 200)]
+        )
+        self.client = Client()
+
+    def test_page_links_are_windowed(self):
+        page = Paginator(range(1000), 10).page(50)
+        self.assertEqual(page_window(page),
+                         [1, None, 48, 49, 50, 51, 52, None, 100])
+        page = Paginator(range(30), 10).page(1)
+        self.assertEqual(page_window(page), [1, 2, 3])
+        response = self.client.get(reverse("index") + "?page=10")
+        self.assertContains(response, "?page=20")
+        self.assertNotContains(response, "?page=15")
+
+    def index_count(self):
+        return approximate_count(Post.objects.all())
+
+    def test_big_counts_are_cached(self):
+        with self.settings(COUNT_CACHE_MIN=300):
+            self.assertEqual(self.index_count(), 200)
+            Post.objects.create(text="Новый", author=self.user)
+            self.assertEqual(self.index_count(), 201)
+        with self.settings(COUNT_CACHE_MIN=100):
+            self.assertEqual(self.index_count(), 201)
+            Post.objects.create(text="Новый", author=self.user)
+            self.assertEqual(self.index_count(), 201)
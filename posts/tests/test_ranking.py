@@ -0,0 +1,80 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import ranking
+from posts.models import Comment, Post, User
+from posts.templatetags.page_links import next_cursor
+
+
+@override_settings(POPULAR_COMMENT_WEIGHT=1, POPULAR_FOLLOWER_WEIGHT=0,
+                   POPULAR_HALF_LIFE=3600, POPULAR_WINDOW=86400)
+class RankingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="gelya")
+        self.client = Client()
+
+    def test_score_is_decay_independent_of_the_current_time(self):
+        now = timezone.now()
+        # Three comments, published one half-life (and then some) earlier,
+        # beat none: 2 ** -1 * (1 + 3) > 1.
+        older = ranking.score(now - timedelta(hours=1), 3, 0)
+        newer = ranking.score(now, 0, 0)
+        self.assertGreater(older, newer)
+        self.assertLess(ranking.score(now - timedelta(hours=3), 3, 0), newer)
+
+    def test_new_posts_are_scored_and_rescored_by_the_job(self):
+        quiet = Post.objects.create(text="Тишина", author=self.author)
+        busy = Post.objects.create(text="Обсуждение", author=self.author)
+        old = Post.objects.create(text="Старое", author=self.author)
+        Post.objects.filter(id=old.id).update(
+            pub_date=timezone.now() - timedelta(days=2)
+        )
+        self.assertEqual(Post.objects.get(id=busy.id).score, busy.score)
+        self.assertGreater(busy.score, 0)
+        for _ in range(3):
+            Comment.objects.create(post=busy, author=self.author, text="!")
+        Comment.objects.create(post=old, author=self.author, text="!")
+        # The old post is outside POPULAR_WINDOW.
+        out = StringIO()
+        call_command("rescore_posts", stdout=out)
+        self.assertIn("Rescored 1 posts", out.getvalue())
+        self.assertEqual(ranking.rescore(), 0)
+        self.assertEqual(ranking.rescore(window=0), 1)
+        response = self.client.get(reverse("popular"))
+        self.assertEqual(
+            [post.id for post in response.context["page"]],
+            [busy.id, quiet.id, old.id]
+        )
+
+    def test_cursor_pages_keep_the_popular_order(self):
+        posts = Post.objects.bulk_create(
+            Post(text=f"Пост {i}", author=self.author) for i in range(12)
+        )
+        # Oldest first, unlike the index.
+        for rank, post in enumerate(posts):
+            Post.objects.filter(text=post.text).update(score=-rank)
+        expected = list(Post.objects.order_by("-score", "-id").values_list(
+            "id", flat=True
+        ))
+        seen, cursor = [], ""
+        while cursor is not None:
+            page = self.client.get(
+                reverse("popular"), {"cursor": cursor}
+            ).context["page"]
+            seen.extend(post.id for post in page)
+            cursor = page.next_cursor
+        self.assertEqual(seen, expected)
+        # The cursor after a numbered page continues the same order.
+        cache.clear()
+        page = self.client.get(reverse("popular")).context["page"]
+        page = self.client.get(
+            reverse("popular"), {"cursor": next_cursor(page)}
+        ).context["page"]
+        self.assertEqual([post.id for post in page], expected[10:])
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, SearchToken, User
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="gelya")
+        self.cats = Post.objects.create(
+            text="Смешные котики и котята", author=self.user
+        )
+        self.dogs = Post.objects.create(
+            text="Собаки лучше котиков", author=self.user
+        )
+        self.client = Client()
+
+    def search(self, query):
+        response = self.client.get(reverse("search"), {"q": query})
+        return list(response.context.get("page"))
+
+    def test_finds_word_forms_and_ranks_by_matches(self):
+        self.assertEqual(self.search("котик"), [self.dogs, self.cats])
+        self.assertEqual(self.search("смешной котик"), [self.cats, self.dogs])
+        self.assertEqual(self.search("собака"), [self.dogs])
+        self.assertEqual(self.search("и"), [])
+
+    def test_cursor_pages_keep_the_ranking(self):
+        for i in range(12):
+            # Older posts match both words, so rank differs from date.
+            text = "Котик и собака" if i < 6 else "Котик " * (i % 3 + 1)
+            Post.objects.create(text=text, author=self.user)
+        query = "котик собака"
+        numbered = []
+        for number in (1, 2):
+            response = self.client.get(
+                reverse("search"), {"q": query, "page": number}
+            )
+            numbered.extend(response.context["page"])
+        seen, cursor = [], ""
+        while cursor is not None:
+            page = self.client.get(
+                reverse("search"), {"q": query, "cursor": cursor}
+            ).context["page"]
+            seen.extend(page)
+            cursor = page.next_cursor
+        self.assertEqual(len(numbered), 14)
+        self.assertEqual(seen, numbered)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.cats.text = "Попугаи"
+        self.cats.save()
+        self.assertEqual(self.search("котик"), [self.dogs])
+        self.assertEqual(self.search("попугай"), [self.cats])
+        self.dogs.delete()
+        self.assertFalse(SearchToken.objects.filter(term="собак"))
+
+    def test_admin_search_uses_index(self):
+        admin = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "собаки"}
+        )
+        self.assertEqual(
+            list(response.context["cl"].result_list), [self.dogs]
+        )
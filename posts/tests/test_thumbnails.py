@@ -0,0 +1,51 @@
+import io
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import delete
+
+from posts import thumbnails
+from posts.models import Post, User
+
+
+class ThumbnailPipelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="gelya")
+        content = io.BytesIO()
+        Image.new("RGB", (1200, 800), "red").save(content, "PNG")
+        self.post = Post.objects.create(
+            text="Тестовый текст",
+            author=self.user,
+            image=SimpleUploadedFile("big.png", content.getvalue(),
+                                     content_type="image/png")
+        )
+        self.url = reverse(
+            "post", kwargs={"username": "gelya", "post_id": self.post.id}
+        )
+        self.client = Client()
+
+    def tearDown(self):
+        # Removes the source image and every generated thumbnail.
+        delete(self.post.image)
+
+    def test_placeholder_until_thumbnail_is_generated(self):
+        response = self.client.get(self.url)
+        self.assertNotContains(response, "<img")
+        self.assertContains(response, "card-img bg-light")
+
+        thumbnails.generate(self.post.id, self.post.image.name)
+
+        response = self.client.get(self.url)
+        self.assertContains(response, '<img class="card-img" src="/media/')
+        thumbnail = thumbnails.cached_thumbnail(self.post.image, "card")
+        self.assertEqual((thumbnail.width, thumbnail.height), (960, 339))
+
+    def test_enqueue_waits_for_commit(self):
+        queued = len(connection.run_on_commit)
+        thumbnails.enqueue(self.post)
+        self.assertEqual(len(connection.run_on_commit), queued + 1)
@@ -0,0 +1,106 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username="gelya")
+        self.reader = User.objects.create(username="bardem")
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow_page(self):
+        response = self.client.get(reverse("follow_index"))
+        return list(response.context.get("page").object_list)
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text="Тестовый текст", author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.follow_page(), [post])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        posts = [
+            Post.objects.create(text=str(i), author=self.author)
+            for i in range(3)
+        ]
+        self.client.get(
+            reverse("profile_follow", kwargs={"username": "gelya"})
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 3
+        )
+        self.assertEqual(self.follow_page(), posts[::-1])
+        self.client.get(
+            reverse("profile_unfollow", kwargs={"username": "gelya"})
+        )
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.follow_page(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_celebrity_posts_are_merged_on_read(self):
+        other = User.objects.create(username="hammer")
+        Follow.objects.create(user=self.reader, author=other)
+        Follow.objects.create(user=self.reader, author=self.author)
+        celebrity_post = Post.objects.create(text="1", author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=celebrity_post))
+        self.assertEqual(self.follow_page(), [celebrity_post])
+
+    def test_demoted_celebrities_stay_merged_until_a_rebuild(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        with override_settings(TIMELINE_FANOUT_LIMIT=0):
+            post = Post.objects.create(text="1", author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post))
+        # Back under the limit, with the cached set of celebrities gone.
+        cache.clear()
+        self.assertEqual(self.follow_page(), [post])
+        timeline.rebuild()
+        self.assertEqual(timeline.celebrity_ids(), set())
+        self.assertTrue(TimelineEntry.objects.filter(post=post))
+        self.assertEqual(self.follow_page(), [post])
+
+    def test_rebuild_restores_entries(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.bulk_create(
+            [Post(text=str(i), author=self.author) for i in range(4)]
+        )
+        timeline.rebuild()
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 4
+        )
+
+    def test_feed_is_a_range_read_on_the_timeline_index(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(text="1", author=self.author)
+        posts = timeline.timeline_posts(self.reader)[:5]
+        plan = posts.explain()
+        self.assertIn("timeline_user_date_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    @override_settings(TIMELINE_LENGTH=3, TIMELINE_TRIM_INTERVAL=1)
+    def test_timelines_keep_the_newest_posts(self):
+        other = User.objects.create(username="hammer")
+        Post.objects.bulk_create(
+            Post(text=str(i), author=(self.author, other)[i % 2])
+            for i in range(6)
+        )
+
+        def entries():
+            return list(TimelineEntry.objects.filter(
+                user=self.reader
+            ).values_list("post__text", flat=True))
+
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=other)
+        self.assertEqual(entries(), ["5", "4", "3"])
+        timeline.rebuild()
+        self.assertEqual(entries(), ["5", "4", "3"])
+        Post.objects.create(text="6", author=self.author)
+        self.assertEqual(entries(), ["6", "5", "4"])
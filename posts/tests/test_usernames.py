@@ -0,0 +1,70 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import usernames
+from posts.models import User
+
+
+class UsernameFilterTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "usernames.bloom")
+        settings = override_settings(USERNAME_FILTER_PATH=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create(username="gelya")
+
+    def test_unknown_usernames_404_without_queries(self):
+        self.assertTrue(usernames.may_exist("gelya"))
+        with self.assertNumQueries(0):
+            response = self.client.get("/wp-login.php/")
+        self.assertEqual(response.status_code, 404)
+        with self.assertNumQueries(0):
+            response = self.client.get("/wp-admin/1/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_signups_and_renames_are_added(self):
+        User.objects.create(username="bardem")
+        self.user.username = "gelya2"
+        self.user.save()
+        for username in ("bardem", "gelya2"):
+            response = self.client.get(reverse("profile", args=[username]))
+            self.assertEqual(response.status_code, 200)
+
+    def test_missing_filter_is_built_on_first_use(self):
+        os.remove(self.path)
+        self.assertTrue(usernames.may_exist("gelya"))
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_startup_rebuilds_only_missing_or_full_filters(self):
+        os.remove(self.path)
+        self.assertTrue(usernames.ensure())
+        self.assertFalse(usernames.ensure())
+        # Past the capacity it was sized for, MIN_CAPACITY here.
+        User.objects.bulk_create(
+            User(username=f"user{i}") for i in range(usernames.MIN_CAPACITY)
+        )
+        self.assertTrue(usernames.ensure())
+        self.assertTrue(usernames.may_exist("user0"))
+
+    def test_rebuild_is_seen_by_mapped_filters(self):
+        usernames.may_exist("gelya")
+        # Added behind the signals' back, like bulk_create does.
+        User.objects.filter(id=self.user.id).update(username="renamed")
+        call_command("rebuild_usernames", stdout=StringIO())
+        self.assertTrue(usernames.may_exist("renamed"))
+
+    def test_false_positive_rate(self):
+        names = [f"user{i}" for i in range(5000)]
+        User.objects.bulk_create(User(username=name) for name in names)
+        self.assertEqual(usernames.rebuild(), 5001)
+        self.assertTrue(all(usernames.may_exist(name) for name in names))
+        probes = [f"probe{i}" for i in range(10000)]
+        passed = sum(usernames.may_exist(name) for name in probes)
+        self.assertLess(passed / len(probes), 0.02)
@@ -5,7 +5,9 @@ from django import forms
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.models import Comment, Follow, Group, Post, User
@@ -212,13 +214,16 @@ class PostsModelTests(TestCase):
 
     def test_home_page_cache(self):
         response = self.client.get(reverse("index"))
+        Post.objects.filter(id=self.post.id).update(text="Text")
+        response_cached = self.client.get(reverse("index"))
+        self.assertEqual(response_cached.content, response.content)
         Post.objects.create(
             text="Text",
             author=self.user,
             group=self.group
         )
         response_new = self.client.get(reverse("index"))
-        self.assertEqual(response_new.content, response.content)
+        self.assertNotEqual(response_new.content, response.content)
 
     def test_following_users(self):
         new_user = User.objects.create(username="bardem")
@@ -298,3 +303,74 @@ class PostsModelTests(TestCase):
             Comment.objects.filter(
                 post_id=f"{self.post.id}").exists()
         )
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class CommentPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="gelya")
+        self.post = Post.objects.create(text="Текст", author=self.user)
+        self.url = reverse(
+            "post", kwargs={"username": "gelya", "post_id": self.post.id}
+        )
+        self.client = Client()
+
+    def add_comments(self, count):
+        for _ in range(count):
+            author = User.objects.create(
+                username=f"reader{Comment.objects.count()}"
+            )
+            Comment.objects.create(
+                post=self.post, author=author,
+                text=f"Комментарий {Comment.objects.count()}"
+            )
+
+    def render_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        return len(queries)
+
+    def test_post_page_shows_first_comments_in_constant_queries(self):
+        self.add_comments(4)
+        before = self.render_queries()
+        self.add_comments(20)
+        self.assertEqual(self.render_queries(), before)
+        response = self.client.get(self.url)
+        self.assertEqual(
+            [comment.text for comment in response.context["comments"]],
+            ["Комментарий 0", "Комментарий 1", "Комментарий 2"]
+        )
+        self.assertContains(response, "Показать ещё")
+
+    @override_settings(COMMENTS_PER_PAGE=50)
+    def test_full_page_of_comments_in_fixed_queries(self):
+        User.objects.bulk_create(
+            User(username=f"reader{i}") for i in range(60)
+        )
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=author, text="Комментарий")
+            for author in User.objects.exclude(id=self.user.id)
+        )
+        cache.clear()
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context["comments"]), 50)
+
+    def test_load_more_returns_the_next_chunk(self):
+        self.add_comments(5)
+        response = self.client.get(self.url)
+        cursor = response.context["comment_nav"].next_cursor
+        fragment = self.client.get(
+            reverse("post_comments", args=["gelya", self.post.id]),
+            {"cursor": cursor}
+        )
+        self.assertTemplateNotUsed(fragment, "base.html")
+        self.assertContains(fragment, "Комментарий 4")
+        self.assertNotContains(fragment, "Комментарий 2")
+        self.assertNotContains(fragment, "Показать ещё")
+        # Without JavaScript the link reloads the post page.
+        response = self.client.get(self.url, {"comments": cursor})
+        self.assertContains(response, "Комментарий 3")
+        self.assertNotContains(response, "Комментарий 0")
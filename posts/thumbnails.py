@@ -0,0 +1,101 @@
+"""Thumbnail generation off the request path.
+
+new_post and post_edit enqueue every size in POST_THUMBNAIL_SIZES to a
+small thread pool. Templates only look thumbnails up in sorl's key-value
+store (see ThumbnailBackend.get_cached) and show a placeholder until the
+worker has produced them, then the worker invalidates the post's card.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import close_old_connections, connection, transaction
+from sorl.thumbnail import base, default
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from . import caching
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+class ThumbnailBackend(base.ThumbnailBackend):
+    def get_cached(self, file_, geometry_string, **options):
+        """Return the thumbnail if it was generated already, else None."""
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault("format", self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def cached_thumbnail(image, size):
+    geometry, options = settings.POST_THUMBNAIL_SIZES[size]
+    return default.backend.get_cached(image, geometry, **options)
+
+
+def generate(post_id, name):
+    from .models import Post
+
+    try:
+        post = Post.objects.select_related("author", "group").filter(
+            id=post_id
+        ).first()
+        if post is None or post.image.name != name:
+            return
+        for geometry, options in settings.POST_THUMBNAIL_SIZES.values():
+            default.backend.get_thumbnail(post.image, geometry, **options)
+        caching.bump(caching.post_card(post.id), *caching.post_scopes(post))
+    except Exception:
+        logger.exception("Could not generate thumbnails for %s", name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+
+
+def _work(post_id, name):
+    close_old_connections()
+    try:
+        generate(post_id, name)
+    finally:
+        connection.close()
+
+
+def _submit(post_id, name):
+    global _executor
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+        if settings.POST_THUMBNAIL_WORKERS and _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.POST_THUMBNAIL_WORKERS,
+                thread_name_prefix="thumbnails"
+            )
+    if _executor is None:
+        generate(post_id, name)
+    else:
+        _executor.submit(_work, post_id, name)
+
+
+def enqueue(post):
+    image = post.image
+    try:
+        if not image or not image.storage.exists(image.name):
+            return
+    except (SuspiciousFileOperation, OSError):
+        return
+    transaction.on_commit(lambda: _submit(post.id, image.name))
@@ -0,0 +1,196 @@
+"""Materialized home timelines for follow_index.
+
+Posts are fanned out on write into TimelineEntry rows of every follower,
+and the feed is sorted by the entries' own (pub_date, post), so reading
+it is a range read on timeline_user_date_idx. A timeline keeps about the
+newest TIMELINE_LENGTH posts: backfills and rebuilds write no more, and
+fan-out trims each timeline back once every TIMELINE_TRIM_INTERVAL
+entries or so.
+
+Authors with more than TIMELINE_FANOUT_LIMIT followers are not fanned out:
+fan_out() marks them Profile.celebrity, and the posts of marked authors
+are merged in on read instead. The mark stays when they fall back under
+the limit, as their timelines lack the posts of their celebrity days,
+until a full rebuild() clears it and writes those posts.
+"""
+import heapq
+from functools import lru_cache
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Q
+
+from . import counters
+from .models import Follow, Post, Profile, TimelineEntry
+
+CELEBRITIES_CACHE_KEY = "timeline:celebrities"
+# Annotations of timeline_posts(): the entry's columns, newest first.
+TIMELINE_ORDERING = ("-timeline_date", "-timeline_post")
+
+
+def celebrity_ids():
+    ids = cache.get(CELEBRITIES_CACHE_KEY)
+    if ids is None:
+        ids = set(Profile.objects.filter(celebrity=True).values_list(
+            "user_id", flat=True
+        ))
+        cache.set(
+            CELEBRITIES_CACHE_KEY, ids, settings.TIMELINE_CELEBRITIES_TIMEOUT
+        )
+    return ids
+
+
+def fan_out(post):
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    followers = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            "user_id", flat=True
+        )[:limit + 1]
+    )
+    if len(followers) > limit:
+        celebrities = celebrity_ids()
+        if post.author_id not in celebrities:
+            Profile.objects.filter(user_id=post.author_id).update(
+                celebrity=True
+            )
+            celebrities.add(post.author_id)
+            cache.set(
+                CELEBRITIES_CACHE_KEY, celebrities,
+                settings.TIMELINE_CELEBRITIES_TIMEOUT
+            )
+        return
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in followers],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    # Spread over posts, so that no single post trims every follower.
+    trim(user_id for user_id in followers
+         if (user_id + post.id) % settings.TIMELINE_TRIM_INTERVAL == 0)
+
+
+def trim(user_ids):
+    """Drop all but the newest TIMELINE_LENGTH entries of every user."""
+    length = settings.TIMELINE_LENGTH
+    for user_id in user_ids:
+        entries = TimelineEntry.objects.filter(user_id=user_id)
+        oldest = entries.values_list("pub_date", "post_id")[length:length + 1]
+        for pub_date, post_id in oldest:
+            entries.filter(
+                Q(pub_date__lt=pub_date)
+                | Q(pub_date=pub_date, post_id__lte=post_id)
+            ).delete()
+
+
+def recent_posts(author_id):
+    return list(Post.objects.filter(author_id=author_id).order_by(
+        "-pub_date", "-id"
+    ).values_list("id", "pub_date")[:settings.TIMELINE_LENGTH])
+
+
+def newest(post_lists):
+    """The newest TIMELINE_LENGTH of several recent_posts() lists."""
+    merged = heapq.merge(*post_lists, key=itemgetter(1, 0), reverse=True)
+    return islice(merged, settings.TIMELINE_LENGTH)
+
+
+def backfill_many(user_id, author_ids):
+    # One query for every author: only the newest TIMELINE_LENGTH of all
+    # their posts make it into the timeline anyway.
+    posts = Post.objects.filter(author_id__in=author_ids).exclude(
+        author_id__in=celebrity_ids()
+    ).order_by("-pub_date", "-id").values_list(
+        "id", "pub_date"
+    )[:settings.TIMELINE_LENGTH]
+    entries = TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in posts],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    if entries:
+        trim([user_id])
+
+
+def backfill(follow):
+    backfill_many(follow.user_id, [follow.author_id])
+
+
+def prune(follow):
+    prune_many(follow.user_id, [follow.author_id])
+
+
+def prune_many(user_id, author_ids):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id__in=author_ids
+    ).delete()
+
+
+def mark_celebrities():
+    """Mark exactly the authors over TIMELINE_FANOUT_LIMIT as celebrities."""
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    Profile.objects.filter(
+        celebrity=True, following_count__lte=limit
+    ).update(celebrity=False)
+    Profile.objects.filter(
+        celebrity=False, following_count__gt=limit
+    ).update(celebrity=True)
+    cache.delete(CELEBRITIES_CACHE_KEY)
+
+
+def rebuild(user_ids=None, batch_size=5000):
+    if user_ids is None:
+        # Writes the posts of authors no longer over the limit, so they
+        # need not be merged on read any more.
+        mark_celebrities()
+    follows = Follow.objects.exclude(author_id__in=celebrity_ids())
+    entries = TimelineEntry.objects.all()
+    if user_ids is not None:
+        follows = follows.filter(user_id__in=user_ids)
+        entries = entries.filter(user_id__in=user_ids)
+    # Entries are written user by user, in the order of the timeline
+    # indexes; the posts of followed authors are looked up once each.
+    follows = follows.order_by("user_id").values_list("user_id", "author_id")
+    posts = lru_cache(maxsize=10000)(recent_posts)
+    adapt = lru_cache(maxsize=None)(connection.ops.adapt_datetimefield_value)
+    fields = ["user", "post", "pub_date"]
+    batch = []
+    with transaction.atomic():
+        entries.delete()
+        for user_id, rows in groupby(follows.iterator(), itemgetter(0)):
+            batch.extend(
+                (user_id, post_id, adapt(pub_date))
+                for post_id, pub_date in newest(
+                    posts(author_id) for _, author_id in rows
+                )
+            )
+            if len(batch) >= batch_size:
+                counters.insert_rows(TimelineEntry, fields, batch)
+                batch = []
+        counters.insert_rows(TimelineEntry, fields, batch)
+
+
+def timeline_posts(user):
+    """The posts of `user`'s home timeline, newest first."""
+    posts = Post.objects.filter(timeline__user=user).annotate(
+        timeline_date=F("timeline__pub_date"),
+        timeline_post=F("timeline__post_id"),
+    ).order_by(*TIMELINE_ORDERING)
+    celebrities = celebrity_ids()
+    if not celebrities:
+        return posts
+    followed = list(
+        Follow.objects.filter(
+            user=user, author_id__in=celebrities
+        ).values_list("author_id", flat=True)
+    )
+    if not followed:
+        return posts
+    return Post.objects.filter(
+        Q(id__in=TimelineEntry.objects.filter(user=user).values("post_id"))
+        | Q(author_id__in=followed)
+    )
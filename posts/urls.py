@@ -1,32 +1,52 @@
 from django.conf.urls import include
-from django.urls import path
+from django.urls import path, register_converter
 
 from . import views
+from .usernames import UsernameConverter
+
+# Unknown usernames do not match, so probes 404 before any query.
+register_converter(UsernameConverter, "username")
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path("more/", views.index_more, name="index_more"),
+    path("popular/", views.popular, name="popular"),
     path("group/<str:slug>/", views.group_posts, name="group"),
+    path("group/<str:slug>/more/", views.group_more, name="group_more"),
     path("new/", views.new_post, name="new_post"),
+    path("search/", views.search, name="search"),
     path("about/", include("about.urls", namespace="about")),
     path("follow/", views.follow_index, name="follow_index"),
+    path("follow/more/", views.follow_more, name="follow_more"),
+    path("follow/batch/", views.follow_batch, name="follow_batch"),
+    path(
+        "follow/suggestions/",
+        views.follow_suggestions, name="follow_suggestions"
+    ),
     path("404/", views.page_not_found, name="page_not_found"),
     path("500/", views.server_error, name="server_error"),
-    path("<str:username>/", views.profile, name="profile"),
-    path("<str:username>/<int:post_id>/", views.post_view, name="post"),
+    path("<username:username>/", views.profile, name="profile"),
+    path("<username:username>/more/", views.profile_more, name="profile_more"),
+    path("<username:username>/<int:post_id>/", views.post_view, name="post"),
     path(
-        "<str:username>/<int:post_id>/edit/",
+        "<username:username>/<int:post_id>/edit/",
         views.post_edit,
         name="post_edit"
     ),
     path(
-        "<str:username>/<int:post_id>/comment/",
+        "<username:username>/<int:post_id>/comments/",
+        views.post_comments,
+        name="post_comments"
+    ),
+    path(
+        "<username:username>/<int:post_id>/comment/",
         views.add_comment,
         name="add_comment"),
     path(
-        "<str:username>/follow/", views.profile_follow, name="profile_follow"
+        "<username:username>/follow/", views.profile_follow, name="profile_follow"
     ),
     path(
-        "<str:username>/unfollow/",
+        "<username:username>/unfollow/",
         views.profile_unfollow, name="profile_unfollow"
     ),
 ]
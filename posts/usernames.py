@@ -0,0 +1,174 @@
+"""Bloom filter of the usernames that exist.
+
+`<str:username>/` routes every unknown first path segment, crawler probes
+like /wp-login.php/ included, to a view that looks the user up and renders
+a 404. The `username` path converter asks the filter first and lets only
+names that may exist reach the view: a Bloom filter has false positives,
+which fall through to the lookup, but no false negatives.
+
+The filter is a file at USERNAME_FILTER_PATH, memory-mapped by every
+process, so a signup in one worker is seen by all of them at once. New
+names are added by posts.signals; rebuild() rewrites the file from the
+User table (with the rebuild_usernames command), which also forgets
+renamed and deleted users and resizes it. yatube/wsgi.py calls ensure()
+at startup, which rebuilds only a missing filter or one that holds more
+users than it was sized for.
+"""
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import User
+
+MAGIC = b"YTUF"
+# Magic, number of hashes, number of bits, users it was sized for.
+HEADER = struct.Struct("<4sIQQ")
+# Room for signups before the next rebuild.
+HEADROOM = 2
+MIN_CAPACITY = 1024
+
+_mapped = {}
+
+
+def sizes(capacity, error):
+    bits = math.ceil(-capacity * math.log(error) / math.log(2) ** 2)
+    bits = -(-bits // 8) * 8
+    return max(1, round(bits / capacity * math.log(2))), bits
+
+
+def positions(username, hashes, bits):
+    # Double hashing: the i-th position is h1 + i * h2.
+    digest = hashlib.blake2b(username.encode(), digest_size=16).digest()
+    first, second = struct.unpack("<QQ", digest)
+    return [(first + i * second) % bits for i in range(hashes)]
+
+
+@contextmanager
+def locked(path):
+    """Serialize writes to the filter at `path` across processes."""
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def open_filter(path):
+    """Map the current file at `path`, remapping it after a rebuild."""
+    inode = os.stat(path).st_ino
+    mapped = _mapped.get(path)
+    if mapped is None or mapped[0] != inode:
+        with open(path, "r+b") as file:
+            data = mmap.mmap(file.fileno(), 0)
+        magic, hashes, bits, _ = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a username filter")
+        mapped = _mapped[path] = (inode, data, hashes, bits)
+    return mapped[1:]
+
+
+def write(path):
+    """Write the filter of every username to `path`, return how many."""
+    # Not a replica: a name missing from the filter is a 404.
+    names = User.objects.using("default").values_list("username", flat=True)
+    count = names.count()
+    capacity = max(count * HEADROOM, MIN_CAPACITY)
+    hashes, bits = sizes(capacity, settings.USERNAME_FILTER_ERROR)
+    array = bytearray(HEADER.size + bits // 8)
+    HEADER.pack_into(array, 0, MAGIC, hashes, bits, capacity)
+    for username in names.iterator():
+        for position in positions(username, hashes, bits):
+            array[HEADER.size + (position >> 3)] |= 1 << (position & 7)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(array)
+    os.replace(temporary, path)
+    return count
+
+
+def is_stale(path):
+    """Whether the filter at `path` is missing or holds too many users.
+
+    Past its capacity the false positive rate of a filter climbs above
+    USERNAME_FILTER_ERROR.
+    """
+    try:
+        with open(path, "rb") as file:
+            magic, _, _, capacity = HEADER.unpack(file.read(HEADER.size))
+    except (FileNotFoundError, struct.error):
+        return True
+    return (magic != MAGIC
+            or User.objects.using("default").count() > capacity)
+
+
+def rebuild(path=None):
+    """Rewrite the filter from the User table, return the names added."""
+    path = path or settings.USERNAME_FILTER_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with locked(path):
+        return write(path)
+
+
+def ensure(path=None):
+    """Rebuild the filter if it is stale, return whether it was."""
+    path = path or settings.USERNAME_FILTER_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Workers starting together check one after another, so only the
+    # first of them rebuilds.
+    with locked(path):
+        if not is_stale(path):
+            return False
+        write(path)
+    return True
+
+
+def add(username, path=None):
+    path = path or settings.USERNAME_FILTER_PATH
+    if not os.path.exists(path):
+        rebuild(path)
+        return
+    with locked(path):
+        data, hashes, bits = open_filter(path)
+        for position in positions(username, hashes, bits):
+            data[HEADER.size + (position >> 3)] |= 1 << (position & 7)
+
+
+def add_user(username):
+    add(username)
+    # A rebuild that read the table before this transaction committed
+    # replaces the file without the name, so add it again once it has.
+    transaction.on_commit(lambda: add(username))
+
+
+def may_exist(username, path=None):
+    path = path or settings.USERNAME_FILTER_PATH
+    try:
+        data, hashes, bits = open_filter(path)
+    except FileNotFoundError:
+        rebuild(path)
+        data, hashes, bits = open_filter(path)
+    return all(
+        data[HEADER.size + (position >> 3)] >> (position & 7) & 1
+        for position in positions(username, hashes, bits)
+    )
+
+
+class UsernameConverter:
+    """`str`, but only for usernames that may exist."""
+    regex = "[^/]+"
+
+    def to_python(self, value):
+        if not may_exist(value):
+            raise ValueError(value)
+        return value
+
+    def to_url(self, value):
+        return value
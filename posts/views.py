@@ -1,18 +1,30 @@
+import json
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
 
+from . import feeds, follows, lookups, thumbnails
+from .caching import versioned_page
+from .counters import stats_for
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Comment, Follow, Post
+from .pagination import COMMENT_ORDERING, CursorPaginator, paginate
+
+# Posts per page of the site-wide feeds (index, popular, search) and of
+# the others.
+INDEX_PAGE_SIZE = 10
+FEED_PAGE_SIZE = 5
 
 
-@cache_page(20)
+@versioned_page("feed")
 def index(request):
-    post_list = Post.objects.select_related("group")
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    post_list = feeds.index_feed()
+    paginator, page = paginate(request, post_list, INDEX_PAGE_SIZE)
+    feeds.prepare(page, request.user)
     return render(
         request,
         "index.html",
@@ -20,12 +32,45 @@ def index(request):
     )
 
 
+def feed_fragment(request, post_list, per_page):
+    """Just the next cards of a feed, for "load more" on its pages.
+
+    Same loader, card cache and page cache as the full page, without
+    base.html around it.
+    """
+    paginator = CursorPaginator(post_list, per_page)
+    page = paginator.get_page(request.GET.get("cursor"))
+    feeds.prepare(page, request.user)
+    return render(
+        request,
+        "includes/post_list.html",
+        {"page": page, "fragment_url": request.path}
+    )
+
+
+@versioned_page("feed")
+def index_more(request):
+    return feed_fragment(request, feeds.index_feed(), INDEX_PAGE_SIZE)
+
+
+@versioned_page("popular")
+def popular(request):
+    post_list = feeds.popular_feed()
+    paginator, page = paginate(request, post_list, INDEX_PAGE_SIZE)
+    feeds.prepare(page, request.user)
+    return render(
+        request,
+        "popular.html",
+        {"page": page, "paginator": paginator}
+    )
+
+
+@versioned_page("group:{slug}")
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.group_posts.all()
-    paginator = Paginator(posts, 5)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    group = lookups.get_group(slug)
+    posts = feeds.group_feed(group)
+    paginator, page = paginate(request, posts, FEED_PAGE_SIZE)
+    feeds.prepare(page, request.user)
     return render(
         request,
         "group.html", {
@@ -36,6 +81,28 @@ def group_posts(request, slug):
     )
 
 
+@versioned_page("group:{slug}")
+def group_more(request, slug):
+    group = lookups.get_group(slug)
+    return feed_fragment(request, feeds.group_feed(group), FEED_PAGE_SIZE)
+
+
+def search(request):
+    query = request.GET.get("q", "").strip()
+    paginator, page = paginate(
+        request, feeds.search_feed(query), INDEX_PAGE_SIZE
+    )
+    feeds.prepare(page, request.user)
+    return render(
+        request,
+        "search.html", {
+            "query": query,
+            "page": page,
+            "paginator": paginator
+        }
+    )
+
+
 @login_required
 def new_post(request):
     if request.method == "POST":
@@ -43,7 +110,9 @@ def new_post(request):
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
-            post.save()
+            with transaction.atomic():
+                post.save()
+                thumbnails.enqueue(post)
             return redirect("index")
         return render(request, "posts/new.html", {"form": form})
 
@@ -51,15 +120,16 @@ def new_post(request):
     return render(request, "posts/new.html", {"form": form, "is_edit": False})
 
 
+@versioned_page("author:{username}")
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    post_count = post_list.count()
-    paginator = Paginator(post_list, 5)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    followers_count = author.follower.count()
-    following_count = author.following.count()
+    author = lookups.get_user(username)
+    post_list = feeds.author_feed(author)
+    paginator, page = paginate(request, post_list, FEED_PAGE_SIZE)
+    feeds.prepare(page, request.user)
+    stats = stats_for(author)
+    # The numbered paginator has counted the posts already (exactly, up to
+    # COUNT_CACHE_MIN), reuse it.
+    post_count = getattr(paginator, "count", stats.posts_count)
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user, author=author
     ).exists()
@@ -71,34 +141,77 @@ def profile(request, username):
             "post_count": post_count,
             "paginator": paginator,
             "following": following,
-            "followers_count": followers_count,
-            "following_count": following_count,
+            "followers_count": stats.followers_count,
+            "following_count": stats.following_count,
         }
     )
 
 
+@versioned_page("author:{username}")
+def profile_more(request, username):
+    author = lookups.get_user(username)
+    return feed_fragment(request, feeds.author_feed(author), FEED_PAGE_SIZE)
+
+
+# Not cached: the comment form carries a CSRF token.
+@versioned_page("post:{post_id}", "author:{username}", store=False)
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
-    posts_count = post.author.posts.count()
+    post = lookups.get_post(username, post_id)
+    feeds.prepare([post], request.user)
+    stats = stats_for(post.author)
     form = CommentForm()
-    comments = post.comments.all()
-    followers_count = post.author.follower.count()
-    following_count = post.author.following.count()
+    comment_nav, comments = comment_page(post, request.GET.get("comments"))
     return render(
         request, "posts/post.html", {
             "author": post.author,
             "post": post,
-            "post_count": posts_count,
+            "post_count": stats.posts_count,
             "form": form,
             "comments": comments,
-            "followers_count": followers_count,
-            "following_count": following_count,
+            "comment_nav": comment_nav,
+            "followers_count": stats.followers_count,
+            "following_count": stats.following_count,
+        }
+    )
+
+
+def comment_page(post, cursor):
+    """A page of comments, and the comments on it with their authors.
+
+    The keyset scan reads only (created, id) from comment_post_created_idx;
+    the rows themselves are then loaded in one batch by primary key.
+    """
+    # Not post.comments: the related manager would read the deferred
+    # post_id of every row to attach the post, one query per comment.
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post.id).only("id", "created"),
+        settings.COMMENTS_PER_PAGE, COMMENT_ORDERING
+    )
+    page = paginator.get_page(cursor)
+    comments = feeds.comments(post).filter(
+        id__in=[comment.id for comment in page]
+    ).order_by(*COMMENT_ORDERING)
+    return page, comments
+
+
+@versioned_page("post:{post_id}")
+def post_comments(request, username, post_id):
+    """The next comments of a post, for "load more" on its page."""
+    post = lookups.get_post(username, post_id)
+    comment_nav, comments = comment_page(post, request.GET.get("cursor"))
+    return render(
+        request,
+        "includes/comment_list.html", {
+            "post": post,
+            "comments": comments,
+            "comment_nav": comment_nav,
         }
     )
 
 
 @ login_required
 def post_edit(request, username, post_id):
+    # Not lookups.get_post(): the form saves the post, counters included.
     post = get_object_or_404(Post, author__username=username, id=post_id)
     if request.user != post.author:
         return redirect("post", username=username, post_id=post_id)
@@ -108,7 +221,9 @@ def post_edit(request, username, post_id):
         instance=post
     )
     if request.method == "POST" and form.is_valid():
-        form.save()
+        with transaction.atomic():
+            post = form.save()
+            thumbnails.enqueue(post)
         return redirect("post", username=username, post_id=post_id)
     return render(request, "posts/new.html", {"form": form, "post": post,
                                               "is_edit": True})
@@ -129,35 +244,93 @@ def server_error(request):
 
 @ login_required
 def add_comment(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
+    post = lookups.get_post(username, post_id)
     form = CommentForm(request.POST or None)
     if request.method == "POST" and form.is_valid:
         comment = form.save(commit=False)
         comment.post = post
         comment.author = request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect("post", username=username, post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, 5)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
-    return render(request, "follow.html", {"page": page, "paginator": paginator})
+    post_list = feeds.follow_feed(request.user)
+    paginator, page = paginate(request, post_list, FEED_PAGE_SIZE)
+    feeds.prepare(page, request.user)
+    return render(
+        request,
+        "follow.html",
+        {
+            "page": page,
+            "paginator": paginator,
+            "suggestions": follows.suggestions(request.user),
+        }
+    )
+
+
+@login_required
+def follow_more(request):
+    return feed_fragment(
+        request, feeds.follow_feed(request.user), FEED_PAGE_SIZE
+    )
+
+
+@login_required
+@require_POST
+def follow_batch(request):
+    """Follow and unfollow many authors: JSON or form lists of usernames."""
+    is_json = request.content_type == "application/json"
+    if is_json:
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid JSON")
+        if not isinstance(data, dict):
+            return HttpResponseBadRequest("Expected an object")
+        usernames = {key: data.get(key, [])
+                     for key in ("follow", "unfollow")}
+        for names in usernames.values():
+            if not (isinstance(names, list)
+                    and all(isinstance(name, str) for name in names)):
+                return HttpResponseBadRequest("Expected lists of usernames")
+    else:
+        usernames = {key: request.POST.getlist(key)
+                     for key in ("follow", "unfollow")}
+    if sum(map(len, usernames.values())) > settings.FOLLOW_BATCH_LIMIT:
+        return HttpResponseBadRequest("Too many usernames")
+    followed = follows.follow_many(request.user, usernames["follow"])
+    unfollowed = follows.unfollow_many(request.user, usernames["unfollow"])
+    if not is_json:
+        return redirect("follow_index")
+    return JsonResponse({
+        "followed": [author.username for author in followed],
+        "unfollowed": [author.username for author in unfollowed],
+    })
+
+
+@login_required
+def follow_suggestions(request):
+    return JsonResponse({"suggestions": [
+        {"username": suggestion.author.username, "score": suggestion.score}
+        for suggestion in follows.suggestions(request.user)
+    ]})
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = lookups.get_user(username)
     if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        with transaction.atomic():
+            Follow.objects.get_or_create(user=request.user, author=author)
     return redirect("profile", username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    author = lookups.get_user(username)
+    with transaction.atomic():
+        Follow.objects.filter(user=request.user, author=author).delete()
     return redirect("profile", username=username)
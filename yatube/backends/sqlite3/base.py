@@ -0,0 +1,72 @@
+"""SQLite backend tuned for a web server with several workers.
+
+On top of Django's backend it
+
+* applies OPTIONS["pragmas"] to every new connection: WAL journaling lets
+  readers run alongside the single writer, synchronous=NORMAL syncs only
+  at checkpoints, cache_size and mmap_size keep hot pages in memory;
+* starts transactions with BEGIN IMMEDIATE when OPTIONS["transaction_mode"]
+  is "IMMEDIATE". A deferred transaction that reads before it writes can
+  not wait for the write lock and fails with "database is locked" at once;
+  an immediate one takes the lock up front and waits for up to
+  OPTIONS["timeout"] seconds instead. read_transaction() opens a deferred
+  one for long jobs that only read: in WAL mode it still sees a single
+  snapshot, and it leaves the write lock to the site.
+
+    DATABASES = {
+        "default": {
+            "ENGINE": "yatube.backends.sqlite3",
+            "NAME": "db.sqlite3",
+            "OPTIONS": {
+                "timeout": 20,
+                "transaction_mode": "IMMEDIATE",
+                "pragmas": {"journal_mode": "wal", "synchronous": "normal"},
+            },
+        }
+    }
+"""
+from contextlib import contextmanager
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        # Not arguments of sqlite3.connect().
+        self.pragmas = kwargs.pop("pragmas", {})
+        self.transaction_mode = kwargs.pop(
+            "transaction_mode", "DEFERRED"
+        ).upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode must be one of {TRANSACTION_MODES}"
+            )
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.transaction_mode
+        if self.is_in_memory_db():
+            # Shared-cache memory databases (tests) lock per table and
+            # ignore the busy timeout; taking the lock early only fails.
+            mode = "DEFERRED"
+        self.cursor().execute(f"BEGIN {mode}")
+
+    @contextmanager
+    def read_transaction(self):
+        mode, self.transaction_mode = self.transaction_mode, "DEFERRED"
+        try:
+            with transaction.atomic(using=self.alias):
+                yield
+        finally:
+            self.transaction_mode = mode
@@ -0,0 +1,244 @@
+"""Cache backend shared by all worker processes on one host.
+
+Entries live in a SQLite file in WAL mode, so readers in different
+processes do not block each other and an invalidation done by one gunicorn
+worker is seen by all of them. Eviction is least-recently-used, bounded by
+MAX_ENTRIES and, optionally, by MAX_SIZE bytes of pickled values.
+
+    CACHES = {
+        "default": {
+            "BACKEND": "yatube.cache.SQLiteCache",
+            "LOCATION": "/var/tmp/yatube-cache.sqlite3",
+            "OPTIONS": {"MAX_ENTRIES": 100000, "MAX_SIZE": 256 * 2 ** 20},
+        }
+    }
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+"""
+
+# Recency is only written back when it is older than this, so that a hot
+# key does not turn every read into a write.
+ACCESS_RESOLUTION = 1.0
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        options = params.get("OPTIONS", {})
+        self._max_size = int(options.get("MAX_SIZE", 0))
+        self._cull_every = int(options.get("CULL_EVERY", 100))
+        self._writes = 0
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        # Connections must not cross fork() or threads.
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None,
+                check_same_thread=False
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _dumps(self, value):
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        now = time.time()
+        placeholders = ",".join("?" * len(keys))
+        rows = self._db.execute(
+            "SELECT key, value, expires, accessed FROM cache "
+            f"WHERE key IN ({placeholders})", list(keys)
+        ).fetchall()
+        found, stale = {}, []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                continue
+            found[keys[key]] = pickle.loads(value)
+            if accessed < now - ACCESS_RESOLUTION:
+                stale.append((now, key))
+        if stale:
+            self._db.executemany(
+                "UPDATE cache SET accessed = ? WHERE key = ?", stale
+            )
+        return found
+
+    def _store(self, mode, key, value, timeout, version):
+        key = self._key(key, version)
+        value = self._dumps(value)
+        now, expires = time.time(), self.get_backend_timeout(timeout)
+        with self._transaction() as db:
+            if mode == "add":
+                # Expired rows do not count as present for add().
+                db.execute(
+                    "DELETE FROM cache WHERE key = ? AND expires <= ?",
+                    (key, now)
+                )
+            cursor = db.execute(
+                f"INSERT OR {'IGNORE' if mode == 'add' else 'REPLACE'} "
+                "INTO cache (key, value, size, expires, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), expires, now)
+            )
+        self._maybe_cull()
+        return cursor.rowcount > 0
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._store("add", key, value, timeout, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store("set", key, value, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        rows = []
+        for key, value in data.items():
+            value = self._dumps(value)
+            rows.append((self._key(key, version), value, len(value),
+                         expires, now))
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO cache "
+                "(key, value, size, expires, accessed) "
+                "VALUES (?, ?, ?, ?, ?)", rows
+            )
+        self._maybe_cull()
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        cursor = self._db.execute(
+            "UPDATE cache SET expires = ? WHERE key = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (expires, self._key(key, version), time.time())
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT value FROM cache WHERE key = ? "
+                "AND (expires IS NULL OR expires > ?)", (key, time.time())
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            pickled = self._dumps(value)
+            db.execute(
+                "UPDATE cache SET value = ?, size = ? WHERE key = ?",
+                (pickled, len(pickled), key)
+            )
+        return value
+
+    def delete(self, key, version=None):
+        self._db.execute(
+            "DELETE FROM cache WHERE key = ?", (self._key(key, version),)
+        )
+
+    def delete_many(self, keys, version=None):
+        self._db.executemany(
+            "DELETE FROM cache WHERE key = ?",
+            [(self._key(key, version),) for key in keys]
+        )
+
+    def has_key(self, key, version=None):
+        return self._db.execute(
+            "SELECT 1 FROM cache WHERE key = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (self._key(key, version), time.time())
+        ).fetchone() is not None
+
+    def clear(self):
+        self._db.execute("DELETE FROM cache")
+
+    def close(self, **kwargs):
+        # Connections are reused across requests on purpose.
+        pass
+
+    def _transaction(self):
+        return _Immediate(self._db)
+
+    def _maybe_cull(self):
+        self._writes += 1
+        if self._writes % self._cull_every:
+            return
+        self.cull()
+
+    def cull(self):
+        with self._transaction() as db:
+            db.execute(
+                "DELETE FROM cache WHERE expires <= ?", (time.time(),)
+            )
+            count, size = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()
+            excess = count - self._max_entries
+            if excess > 0:
+                # Like Django's own backends, cull a fraction at once.
+                excess = max(excess, count // self._cull_frequency)
+                db.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+                    "ORDER BY accessed LIMIT ?)", (excess,)
+                )
+            if self._max_size and size > self._max_size:
+                # Drop the least recently used prefix covering the excess.
+                db.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM ("
+                    "SELECT key, size, SUM(size) OVER "
+                    "(ORDER BY accessed, key) AS total FROM cache"
+                    ") WHERE total - size < ?)", (size - self._max_size,)
+                )
+
+
+class _Immediate:
+    """BEGIN IMMEDIATE ... COMMIT, so read-modify-write is atomic."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
@@ -0,0 +1,306 @@
+"""Per-view request metrics, aggregated in process.
+
+MetricsMiddleware times a sample of requests (METRICS_SAMPLE_RATE) and
+adds to histograms keyed by view name:
+
+* wall time of the whole request,
+* number and total time of SQL queries (via connection.execute_wrapper),
+* template render time (templates come from the DjangoTemplates backend
+  below),
+* cache hits and misses (from the cache backends below).
+
+Requests that are not sampled only pay for one random() call; the hooks in
+the template and cache backends find no active sample and return. Every
+worker process keeps its own numbers, which is what Prometheus expects
+when each worker is scraped as a separate target.
+"""
+import bisect
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.views import redirect_to_login
+from django.core.cache.backends import locmem
+from django.db import connections
+from django.http import HttpResponse
+from django.shortcuts import render
+from django.template.backends import django as django_backend
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+
+from . import cache as sqlite_cache
+
+PREFIX = "yatube_"
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+HISTOGRAMS = {
+    "request_duration_seconds": ("Wall time of the request", TIME_BUCKETS),
+    "db_queries": ("SQL queries per request", COUNT_BUCKETS),
+    "db_duration_seconds": ("Time spent in SQL per request", TIME_BUCKETS),
+    "template_duration_seconds": (
+        "Time spent rendering templates per request", TIME_BUCKETS
+    ),
+}
+COUNTERS = {
+    "cache_hits_total": "Cache keys found",
+    "cache_misses_total": "Cache keys not found",
+}
+
+_missing = object()
+_local = threading.local()
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # The last slot counts observations above the largest bucket.
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket."""
+        if not self.count:
+            return None
+        rank, lower, below = q * self.count, 0, 0
+        for bound, total in self.cumulative():
+            if total >= rank:
+                if bound == float("inf"):
+                    return lower
+                inside = total - below
+                return lower + (bound - lower) * (rank - below) / inside
+            lower, below = bound, total
+        return lower
+
+
+class Sample:
+    __slots__ = ("queries", "db_time", "template_time", "cache_hits",
+                 "cache_misses", "rendering")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0
+        self.template_time = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+def active_sample():
+    return getattr(_local, "sample", None)
+
+
+def record(view, duration, sample):
+    values = {
+        "request_duration_seconds": duration,
+        "db_queries": sample.queries,
+        "db_duration_seconds": sample.db_time,
+        "template_duration_seconds": sample.template_time,
+    }
+    with _lock:
+        for name, value in values.items():
+            key = (name, view)
+            if key not in _histograms:
+                _histograms[key] = Histogram(HISTOGRAMS[name][1])
+            _histograms[key].observe(value)
+        for name, value in (("cache_hits_total", sample.cache_hits),
+                            ("cache_misses_total", sample.cache_misses)):
+            _counters[name, view] = _counters.get((name, view), 0) + value
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+        sample = _local.sample = Sample()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sample))
+                response = self.get_response(request)
+        finally:
+            _local.sample = None
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "<unresolved>"
+        record(view, time.perf_counter() - started, sample)
+        return response
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        sample = active_sample()
+        # Only the outermost render counts, included templates are inside.
+        if sample is None or sample.rendering:
+            return super().render(context, request)
+        sample.rendering = True
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            sample.template_time += time.perf_counter() - started
+            sample.rendering = False
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """The stock backend with render time counted per request."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return Template(
+            super().get_template(template_name).template, self
+        )
+
+
+class LocMemCache(locmem.LocMemCache):
+    # get_many() is BaseCache's and calls get() for every key.
+    def get(self, key, default=None, version=None):
+        sample = active_sample()
+        if sample is None:
+            return super().get(key, default, version)
+        value = super().get(key, _missing, version)
+        if value is _missing:
+            sample.cache_misses += 1
+            return default
+        sample.cache_hits += 1
+        return value
+
+
+class SQLiteCache(sqlite_cache.SQLiteCache):
+    # get() goes through get_many().
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        sample = active_sample()
+        if sample is not None:
+            sample.cache_hits += len(found)
+            sample.cache_misses += len(keys) - len(found)
+        return found
+
+
+def _labels(view):
+    view = view.replace("\\", "\\\\").replace('"', '\\"')
+    return f'view="{view}"'
+
+
+def prometheus_text():
+    prefix = PREFIX
+    with _lock:
+        histograms = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+    lines = []
+    for name, (help_text, _) in HISTOGRAMS.items():
+        lines.append(f"# HELP {prefix}{name} {help_text}")
+        lines.append(f"# TYPE {prefix}{name} histogram")
+        for (metric, view), histogram in histograms:
+            if metric != name:
+                continue
+            labels = _labels(view)
+            for bound, total in histogram.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f'{prefix}{name}_bucket{{{labels},le="{le}"}} {total}'
+                )
+            lines.append(f"{prefix}{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(
+                f"{prefix}{name}_count{{{labels}}} {histogram.count}"
+            )
+    for name, help_text in COUNTERS.items():
+        lines.append(f"# HELP {prefix}{name} {help_text}")
+        lines.append(f"# TYPE {prefix}{name} counter")
+        for (metric, view), value in counters:
+            if metric == name:
+                lines.append(f"{prefix}{name}{{{_labels(view)}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def summary():
+    """One row per view for the admin page, slowest first."""
+    with _lock:
+        histograms = dict(_histograms)
+        counters = dict(_counters)
+    rows = []
+    for (name, view), duration in histograms.items():
+        if name != "request_duration_seconds":
+            continue
+        hits = counters.get(("cache_hits_total", view), 0)
+        lookups = hits + counters.get(("cache_misses_total", view), 0)
+        means = {
+            metric: histograms[metric, view].sum / duration.count
+            for metric in HISTOGRAMS
+        }
+        rows.append({
+            "view": view,
+            "requests": duration.count,
+            "p50": duration.quantile(0.5) * 1000,
+            "p95": duration.quantile(0.95) * 1000,
+            "p99": duration.quantile(0.99) * 1000,
+            "queries": means["db_queries"],
+            "db_time": means["db_duration_seconds"] * 1000,
+            "template_time": means["template_duration_seconds"] * 1000,
+            "cache_hit_rate": hits / lookups if lookups else None,
+        })
+    return sorted(rows, key=lambda row: row["p95"], reverse=True)
+
+
+def _has_token(request):
+    token = settings.METRICS_TOKEN
+    return bool(token) and constant_time_compare(
+        request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}"
+    )
+
+
+def prometheus(request):
+    """Scrapers authenticate with METRICS_TOKEN, people as staff."""
+    if not _has_token(request) and not request.user.is_staff:
+        return redirect_to_login(
+            request.get_full_path(), reverse("admin:login")
+        )
+    return HttpResponse(
+        prometheus_text(), content_type="text/plain; version=0.0.4"
+    )
+
+
+@staff_member_required
+def metrics(request):
+    return render(request, "metrics.html", {
+        "rows": summary(),
+        "sample_rate": settings.METRICS_SAMPLE_RATE,
+    })
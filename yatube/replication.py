@@ -0,0 +1,29 @@
+"""Local stand-in for database replication.
+
+Copies default over every file in DATABASE_REPLICAS with SQLite's online
+backup API. Connections already open on a replica see the new contents on
+their next read, so the site keeps running while it syncs. Run it more
+often than DATABASE_REPLICA_LAG:
+
+    python manage.py replicate --interval 2
+"""
+import sqlite3
+
+from django.conf import settings
+
+
+def copy(source, target, timeout=30):
+    source = sqlite3.connect(source, timeout=timeout)
+    target = sqlite3.connect(target, timeout=timeout)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def sync():
+    source = settings.DATABASES["default"]["NAME"]
+    for alias in settings.DATABASE_REPLICAS:
+        copy(source, settings.DATABASES[alias]["NAME"])
+    return len(settings.DATABASE_REPLICAS)
@@ -0,0 +1,84 @@
+"""Read/write splitting between default and its replicas.
+
+Reads go to a replica only inside GET and HEAD requests to the views named
+in DATABASE_REPLICA_VIEWS; one replica is picked per request. Writes,
+every other request, management commands and sessions use default.
+
+Replicas trail default by up to DATABASE_REPLICA_LAG seconds (see
+yatube/replication.py). A request that writes sets a cookie that keeps the
+user on default for that long, so they always see their own changes, and
+pages and post cards rendered from a replica are cached no longer than
+that either.
+"""
+import random
+import threading
+
+from django.conf import settings
+
+STICKY_COOKIE = "use_primary"
+# Sessions are read on every request, right after login writes them.
+PRIMARY_APPS = {"sessions"}
+
+_state = threading.local()
+
+
+def replica_alias():
+    """The replica the current request reads from, if any."""
+    return getattr(_state, "alias", None)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        if alias is None or model._meta.app_label in PRIMARY_APPS:
+            return "default"
+        return alias
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as default.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaRoutingMiddleware:
+    """Pick the database for reads and keep writers on default.
+
+    Must come before SessionMiddleware, so that a session saved on the
+    way out counts as a write.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.database_sticky = STICKY_COOKIE in request.COOKIES
+        request.read_replica = None
+        _state.alias, _state.wrote = None, False
+        try:
+            response = self.get_response(request)
+            wrote = _state.wrote
+        finally:
+            _state.alias, _state.wrote = None, False
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                STICKY_COOKIE, "1", max_age=settings.DATABASE_REPLICA_LAG,
+                httponly=True, samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in ("GET", "HEAD")
+            and not request.database_sticky
+            and request.resolver_match.url_name
+            in settings.DATABASE_REPLICA_VIEWS
+        ):
+            _state.alias = random.choice(settings.DATABASE_REPLICAS)
+            request.read_replica = _state.alias
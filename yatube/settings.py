@@ -37,8 +37,9 @@ ALLOWED_HOSTS = [
 
 INSTALLED_APPS = [
     'about',
+    'api',
     'users',
-    'posts',
+    'posts.apps.PostsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -49,7 +50,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yatube.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,7 +67,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yatube.metrics.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -84,13 +87,60 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# See yatube/backends/sqlite3/base.py for the extra OPTIONS.
+SQLITE_OPTIONS = {
+    # Seconds a writer waits for the lock (SQLite's busy timeout).
+    'timeout': 20,
+    'transaction_mode': 'IMMEDIATE',
+    'pragmas': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'cache_size': -64 * 1024,  # KiB
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'memory',
+    },
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Seconds a connection is kept open between requests.
+        'CONN_MAX_AGE': int(os.environ.get('YATUBE_CONN_MAX_AGE', 60)),
+        'OPTIONS': SQLITE_OPTIONS,
     }
 }
 
+# Read-only copies of the database, as a comma-separated list of files in
+# YATUBE_DB_REPLICAS, kept up to date by `manage.py replicate`. See
+# yatube/routers.py for which reads go to them; tests read from default.
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+        filter(None, os.environ.get('YATUBE_DB_REPLICAS', '').split(',')), 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'OPTIONS': {
+            **SQLITE_OPTIONS,
+            'pragmas': {**SQLITE_OPTIONS['pragmas'], 'query_only': 'on'},
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['yatube.routers.PrimaryReplicaRouter']
+
+# URL names of the views whose GET requests may read from a replica.
+DATABASE_REPLICA_VIEWS = [
+    'index', 'index_more', 'popular', 'group', 'group_more', 'profile',
+    'profile_more', 'post', 'post_comments', 'follow_index', 'follow_more',
+]
+
+# Seconds the replicas may trail default: how long a user who wrote reads
+# from default, and the longest a page read from a replica is cached.
+DATABASE_REPLICA_LAG = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -147,8 +197,104 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads above this size are streamed to a temporary file, not kept in RAM.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024
+
+POST_IMAGE_MAX_BYTES = 20 * 1024 * 1024
+# Decoded pixels per upload; JPEGs are counted after draft() downscaling.
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+POST_IMAGE_MAX_SIDE = 1920
+POST_IMAGE_QUALITY = 85
+
+THUMBNAIL_BACKEND = 'posts.thumbnails.ThumbnailBackend'
+
+# Every size is generated in the background right after an upload;
+# templates refer to them by name. 0 workers generates them inline.
+POST_THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+
+POST_THUMBNAIL_WORKERS = 2
+
+# The backends in yatube.metrics count hits and misses per request.
+# LocMemCache is private to each worker process. Set YATUBE_CACHE=shared
+# to use one cache file for all workers on the host (see yatube/cache.py).
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'yatube.metrics.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'yatube.metrics.SQLiteCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache.sqlite3')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'MAX_SIZE': 256 * 1024 * 1024,
+        },
+    },
+}
+
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': CACHE_BACKENDS[os.environ.get('YATUBE_CACHE', 'locmem')],
 }
+
+# Feed pages are invalidated by generation counters (posts.caching), so the
+# timeout only bounds memory use, not staleness.
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Followers above which an author's posts are merged into home timelines
+# on read instead of being fanned out on write.
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Posts a home timeline keeps (the feed ends there), and about how many
+# more it may hold between two trims.
+TIMELINE_LENGTH = 500
+TIMELINE_TRIM_INTERVAL = 50
+
+TIMELINE_CELEBRITIES_TIMEOUT = 600
+
+# Most usernames one request to posts.views.follow_batch may list.
+FOLLOW_BATCH_LIMIT = 100
+
+# Suggested authors kept per user by the compute_suggestions command.
+FOLLOW_SUGGESTIONS = 20
+
+# The popular feed (posts.ranking): engagement is comments plus a share
+# of the author's followers, and halves every POPULAR_HALF_LIFE seconds.
+# The rescore_posts command refreshes posts of the last POPULAR_WINDOW.
+POPULAR_COMMENT_WEIGHT = 1
+POPULAR_FOLLOWER_WEIGHT = 0.1
+POPULAR_HALF_LIFE = 60 * 60 * 12
+POPULAR_WINDOW = 60 * 60 * 24 * 3
+
+# Users, groups and posts cached by posts.lookups; saves and deletes
+# invalidate them, this only bounds renames.
+OBJECT_CACHE_TIMEOUT = 60 * 10
+
+# Comments shown on a post page and per "load more" (posts.views).
+COMMENTS_PER_PAGE = 50
+
+# Feed counts from this size up are cached for COUNT_CACHE_TIMEOUT seconds
+# instead of running COUNT(*) for every numbered page (posts.pagination).
+COUNT_CACHE_MIN = 10000
+COUNT_CACHE_TIMEOUT = 60
+
+# Items per page of the JSON API (api/views.py) and the most ?limit= asks.
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# Where the analyze_graph command keeps the follower graph (posts.graph).
+GRAPH_ROOT = os.path.join(BASE_DIR, 'graph')
+
+# Bloom filter of existing usernames shared by the workers (posts.usernames)
+# and the share of unknown names it lets through to the database.
+USERNAME_FILTER_PATH = os.path.join(BASE_DIR, 'usernames.bloom')
+USERNAME_FILTER_ERROR = 0.01
+
+# Share of requests measured by yatube.metrics.MetricsMiddleware.
+METRICS_SAMPLE_RATE = float(os.environ.get('YATUBE_METRICS_SAMPLE_RATE', 1))
+
+# Lets Prometheus scrape /admin/metrics/prometheus/ with
+# "Authorization: Bearer <token>"; staff can always open it.
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN', '')
@@ -19,7 +19,16 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from . import metrics
+
 urlpatterns = [
+    path("admin/metrics/", metrics.metrics, name="metrics"),
+    path(
+        "admin/metrics/prometheus/",
+        metrics.prometheus,
+        name="metrics_prometheus"
+    ),
+    path("api/v1/", include("api.urls", namespace="api")),
     path("auth/", include("users.urls")),
     path("auth/", include("django.contrib.auth.urls")),
     path("", include("posts.urls")),
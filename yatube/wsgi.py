@@ -14,3 +14,14 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Workers start with a username filter of everybody signed up so far.
+from django.db import DatabaseError  # noqa: E402
+
+from posts import usernames  # noqa: E402
+
+try:
+    usernames.ensure()
+except DatabaseError:
+    # Not migrated yet; the filter is built on first use instead.
+    pass